@@ -0,0 +1,293 @@
+
+"""
+Read-only analytics over archived order files.
+
+write_archive() stores orders as fixed-width little-endian records of
+(customer id, coffee id, price in cents) after a 24-byte header, followed by
+the customer and coffee names for each id as UTF-8 JSON. OrderArchive
+maps such a file with mmap (or numpy.memmap when NumPy is installed) and
+answers num_orders, average_price, customers and most_aficionado by id
+straight from the mapped pages, so opening months of history is instant and
+every analyst process shares the same page-cached copy.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from coffee import Coffee
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MAGIC = b"COFFEARC"
+VERSION = 2
+HEADER = struct.Struct("<8sIIQ")  # magic, version, reserved, number of records
+RECORD = struct.Struct("<III")  # customer id, coffee id, price in cents
+
+
+def write_archive(path, orders=None):
+    """
+    Write orders to an archive file.
+    
+    Customers and coffees are numbered from 0 in the order they first appear;
+    their names are stored in the archive so other processes can map ids back.
+    
+    Args:
+        path (str): Archive file to write
+        orders (iterable, optional): Orders to archive (defaults to all orders)
+    
+    Returns:
+        tuple: (dict of Customer to id, dict of Coffee to id)
+    """
+    if orders is None:
+        orders = Coffee._all_orders
+    customer_ids, coffee_ids = {}, {}
+    records = array("I")
+    for order in orders:
+        customer = customer_ids.setdefault(order.customer, len(customer_ids))
+        coffee = coffee_ids.setdefault(order.coffee, len(coffee_ids))
+        records.extend((customer, coffee, order.price_cents))
+    if sys.byteorder == "big":
+        records.byteswap()
+    names = {
+        "customers": [customer.name for customer in customer_ids],
+        "coffees": [coffee.name for coffee in coffee_ids],
+    }
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(records) // 3))
+        records.tofile(f)
+        f.write(json.dumps(names).encode("utf-8"))
+    return customer_ids, coffee_ids
+
+
+class OrderArchive:
+    """A memory-mapped, read-only view of an archive file."""
+    
+    def __init__(self, path, use_numpy=None):
+        """
+        Open an archive file.
+        
+        Args:
+            path (str): Archive file to open
+            use_numpy (bool, optional): Force or disable NumPy (default: use it if installed)
+        
+        Raises:
+            ValueError: If the file is not an archive or is truncated
+            ImportError: If use_numpy is True but NumPy is not installed
+        """
+        if use_numpy is None:
+            use_numpy = np is not None
+        elif use_numpy and np is None:
+            raise ImportError("NumPy is not installed.")
+        self.path = path
+        self._mmap = None
+        self._names = None
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                raise ValueError(f"{path} is not an order archive.")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self._count = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not an order archive.")
+        self._names_offset = HEADER.size + self._count * RECORD.size
+        if self._names_offset > len(self._mmap):
+            self.close()
+            raise ValueError(f"{path} is truncated.")
+        if use_numpy:
+            records = np.frombuffer(
+                self._mmap, dtype=np.dtype("<u4"), count=3 * self._count, offset=HEADER.size
+            ).reshape(-1, 3)
+            self._columns = records[:, 0], records[:, 1], records[:, 2]
+        else:
+            if sys.byteorder == "big":
+                self.close()
+                raise ValueError("Reading archives without NumPy needs a little-endian machine.")
+            self._columns = None
+            self._view = memoryview(self._mmap)[HEADER.size:self._names_offset].cast("I")
+    
+    def __enter__(self):
+        """Return the archive for use in a with block."""
+        return self
+    
+    def __exit__(self, *exc_info):
+        """Close the archive."""
+        self.close()
+    
+    def __len__(self):
+        """Get the number of archived orders."""
+        return self._count
+    
+    @property
+    def customer_names(self):
+        """Get customer names, indexed by customer id."""
+        return self._load_names()["customers"]
+    
+    @property
+    def coffee_names(self):
+        """Get coffee names, indexed by coffee id."""
+        return self._load_names()["coffees"]
+    
+    def coffee_id(self, name):
+        """
+        Look up a coffee's id by name.
+        
+        Args:
+            name (str): The coffee's name
+        
+        Returns:
+            int: The coffee's id, or None if no archived order is for that name
+        """
+        try:
+            return self.coffee_names.index(name)
+        except ValueError:
+            return None
+    
+    def _load_names(self):
+        """
+        Parse the name tables on first use.
+        
+        Returns:
+            dict: "customers" and "coffees" name lists
+        
+        Raises:
+            ValueError: If the name tables are missing or corrupt
+        """
+        if self._names is None:
+            try:
+                self._names = json.loads(self._mmap[self._names_offset:].decode("utf-8"))
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                raise ValueError(f"{self.path} has corrupt name tables.")
+        return self._names
+    
+    def close(self):
+        """Release the mapping."""
+        if self._mmap is None:
+            return
+        self._columns = None
+        if getattr(self, "_view", None) is not None:
+            self._view.release()
+            self._view = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # NumPy arrays handed out by earlier queries still reference the pages
+            pass
+        self._mmap = None
+    
+    def _orders(self, coffee_id):
+        """
+        Iterate over (customer id, price in cents) for one coffee without NumPy.
+        
+        Args:
+            coffee_id (int): The coffee's archive id
+        
+        Returns:
+            iterator: (customer id, price in cents) pairs in archive order
+        """
+        view = self._view
+        return (
+            (customer, price)
+            for customer, coffee, price in zip(view[0::3], view[1::3], view[2::3])
+            if coffee == coffee_id
+        )
+    
+    def _select(self, coffee_id):
+        """
+        Get the customer and price columns for one coffee with NumPy.
+        
+        Args:
+            coffee_id (int): The coffee's archive id
+        
+        Returns:
+            tuple: (customer ids, prices in cents) arrays in archive order
+        """
+        customers, coffees, prices = self._columns
+        mask = coffees == coffee_id
+        return customers[mask], prices[mask]
+    
+    def num_orders(self, coffee_id):
+        """
+        Get the number of archived orders for a coffee.
+        
+        Args:
+            coffee_id (int): The coffee's archive id
+        
+        Returns:
+            int: Number of orders
+        """
+        if self._columns is not None:
+            return int(np.count_nonzero(self._columns[1] == coffee_id))
+        return sum(1 for _ in self._orders(coffee_id))
+    
+    def average_price(self, coffee_id):
+        """
+        Get the average archived price of a coffee.
+        
+        Args:
+            coffee_id (int): The coffee's archive id
+        
+        Returns:
+            float: Average price, or 0 if no orders
+        """
+        if self._columns is not None:
+            _, prices = self._select(coffee_id)
+            if not len(prices):
+                return 0
+            return int(prices.sum(dtype=np.int64)) / (100 * len(prices))
+        total = count = 0
+        for _, price in self._orders(coffee_id):
+            total += price
+            count += 1
+        return total / (100 * count) if count else 0
+    
+    def customers(self, coffee_id):
+        """
+        Get the unique customers who ordered a coffee.
+        
+        Args:
+            coffee_id (int): The coffee's archive id
+        
+        Returns:
+            list: Customer ids in order of their first order for the coffee
+        """
+        if self._columns is not None:
+            customers, _ = self._select(coffee_id)
+            unique, first = np.unique(customers, return_index=True)
+            return unique[np.argsort(first)].tolist()
+        return list(dict.fromkeys(customer for customer, _ in self._orders(coffee_id)))
+    
+    def most_aficionado(self, coffee_id):
+        """
+        Find the customer who spent the most on a coffee.
+        
+        Ties go to the customer whose first order for the coffee came first,
+        as with Customer.most_aficionado.
+        
+        Args:
+            coffee_id (int): The coffee's archive id
+        
+        Returns:
+            int: Customer id, or None if the coffee has no orders
+        """
+        if self._columns is not None:
+            customers, prices = self._select(coffee_id)
+            if not len(customers):
+                return None
+            unique, first, inverse = np.unique(customers, return_index=True, return_inverse=True)
+            totals = np.zeros(len(unique), dtype=np.int64)
+            np.add.at(totals, inverse, prices)
+            tied = np.flatnonzero(totals == totals.max())
+            return int(unique[tied[np.argmin(first[tied])]])
+        spending = {}
+        for customer, price in self._orders(coffee_id):
+            spending[customer] = spending.get(customer, 0) + price
+        if not spending:
+            return None
+        return max(spending, key=spending.get)
@@ -0,0 +1,85 @@
+
+"""
+Measure the cost of idempotency keys on the order-creation path:
+
+python benchmarks/bench_idempotency.py --orders 200000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from customer import Customer
+from coffee import Coffee
+from idempotency import IdempotencyCache
+import order  # noqa: F401 (loaded up front so timings exclude its import)
+
+ALICE = Customer("Alice")
+ESPRESSO = Coffee("Espresso")
+
+
+def reset():
+    """Clear the order ledgers and indexes between runs."""
+    Customer._all_orders = []
+    Coffee._all_orders = []
+
+
+def time_orders(n, keys=None, cache=None):
+    """
+    Time creating n orders.
+    
+    Args:
+        n (int): Number of orders
+        keys (list, optional): Idempotency key for each order
+        cache (IdempotencyCache, optional): Cache to use for the run
+    
+    Returns:
+        float: Nanoseconds per order
+    """
+    reset()
+    if cache is not None:
+        Customer._idempotency = cache
+    # The same customer and coffee every run, so retried keys match their first order
+    customer, coffee = ALICE, ESPRESSO
+    create = customer.create_order
+    start = time.perf_counter()
+    if keys is None:
+        for _ in range(n):
+            create(coffee, 2.5)
+    else:
+        for key in keys:
+            create(coffee, 2.5, idempotency_key=key)
+    return (time.perf_counter() - start) / n * 1e9
+
+
+def main():
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark idempotent order creation.")
+    parser.add_argument("--orders", type=int, default=200000)
+    parser.add_argument("--capacity", type=int, default=100000)
+    args = parser.parse_args()
+    n = args.orders
+    keys = [f"sale-{i}" for i in range(n)]
+    original = Customer._idempotency
+    try:
+        results = [
+            ("no key", time_orders(n)),
+            ("new keys, table only", time_orders(n, keys, IdempotencyCache(args.capacity))),
+            ("new keys, bloom + table", time_orders(n, keys, IdempotencyCache(args.capacity, bloom=True))),
+        ]
+        cache = IdempotencyCache(args.capacity)
+        retries = keys[:min(n, args.capacity)]
+        time_orders(len(retries), retries, cache)
+        results.append(("duplicate keys", time_orders(len(retries), retries, cache)))
+    finally:
+        Customer._idempotency = original
+        reset()
+    for name, ns in results:
+        print(f"{name:<24} {ns:8.0f} ns/order")
+
+
+if __name__ == "__main__":
+    main()
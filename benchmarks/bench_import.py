@@ -0,0 +1,78 @@
+
+"""
+Measure cold-start cost: import time and first-order latency in a fresh process.
+
+python benchmarks/bench_import.py --runs 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each scenario runs in a new interpreter and prints its timings as JSON
+SCENARIOS = {
+    "lazy (import shop)": """
+import shop
+Customer, Coffee = shop.Customer, shop.Coffee
+""",
+    "eager (import order)": """
+from order import Order
+from customer import Customer
+from coffee import Coffee
+""",
+}
+
+TEMPLATE = """
+import json, time
+start = time.perf_counter()
+{imports}
+imported = time.perf_counter()
+customer, coffee = Customer("Alice"), Coffee("Espresso")
+before = time.perf_counter()
+customer.create_order(coffee, 3.0)
+first = time.perf_counter()
+customer.create_order(coffee, 3.0)
+second = time.perf_counter()
+print(json.dumps([imported - start, first - before, second - first]))
+"""
+
+
+def run_once(imports):
+    """
+    Time one scenario in a fresh interpreter.
+    
+    Args:
+        imports (str): Code that makes Customer and Coffee available
+    
+    Returns:
+        list: Seconds for [import, first order, second order]
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", TEMPLATE.format(imports=imports.strip())],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark import time and first-order latency.")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    print(f"{'scenario':<22} {'import ms':>10} {'first order ms':>15} {'import+first ms':>16} {'next order us':>14}")
+    for name, imports in SCENARIOS.items():
+        runs = [run_once(imports) for _ in range(args.runs)]
+        imported, first, second = (statistics.median(column) for column in zip(*runs))
+        print(
+            f"{name:<22} {imported * 1e3:>10.2f} {first * 1e3:>15.2f} "
+            f"{(imported + first) * 1e3:>16.2f} {second * 1e6:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
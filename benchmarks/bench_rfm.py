@@ -0,0 +1,101 @@
+
+"""
+Compare the single-pass RFM job with a naive per-customer loop:
+
+python benchmarks/bench_rfm.py --customers 1000 --orders 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from customer import Customer
+from coffee import Coffee
+from rfm import compute_rfm, np
+
+
+def build_shop(customers, orders, seed=0):
+    """
+    Create customers and random orders.
+    
+    Args:
+        customers (int): Number of customers
+        orders (int): Number of orders
+        seed (int): Random seed
+    
+    Returns:
+        list: The customers
+    """
+    Customer._all_orders = []
+    Coffee._all_orders = []
+    rng = random.Random(seed)
+    people = [Customer(f"C{i}") for i in range(customers)]
+    coffees = [Coffee(name) for name in ("Espresso", "Latte", "Mocha")]
+    # Skewed choice so frequency and recency differ between customers
+    weights = [1 / (i + 1) for i in range(customers)]
+    for person in rng.choices(people, weights, k=orders):
+        person.create_order(rng.choice(coffees), rng.randint(100, 1000) / 100)
+    return people
+
+
+def naive_rfm(customers):
+    """
+    Compute recency, frequency and monetary values one customer at a time.
+    
+    Args:
+        customers (list): The customers
+    
+    Returns:
+        dict: Customer to (last order id, order count, cents spent)
+    """
+    result = {}
+    for customer in customers:
+        orders = customer.orders()
+        if orders:
+            result[customer] = (
+                max(o.id for o in orders), len(orders), sum(o.price_cents for o in orders)
+            )
+    return result
+
+
+def timed(func, *args, **kwargs):
+    """
+    Call a function and measure it.
+    
+    Args:
+        func (callable): Function to call
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+    
+    Returns:
+        tuple: (result, seconds)
+    """
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark RFM segmentation.")
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--orders", type=int, default=100000)
+    parser.add_argument("--skip-naive", action="store_true", help="Only time the batch job")
+    args = parser.parse_args()
+    people = build_shop(args.customers, args.orders)
+    _, python_seconds = timed(compute_rfm, use_numpy=False)
+    print(f"batch (python): {python_seconds:.3f} s")
+    if np is not None:
+        _, numpy_seconds = timed(compute_rfm, use_numpy=True)
+        print(f"batch (numpy):  {numpy_seconds:.3f} s")
+    if not args.skip_naive:
+        _, naive_seconds = timed(naive_rfm, people)
+        print(f"naive loop:     {naive_seconds:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
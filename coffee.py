@@ -1,10 +1,24 @@
 
+import heapq
+import math
+import threading
+from operator import attrgetter
+
+
 class Coffee:
     """Represents a coffee product."""
     
     # Class variable to store all orders across all coffees
     _all_orders = []
     
+    # Held while an order takes its id and is appended to the ledgers, so ids
+    # increase along the ledger
+    _ledger_lock = threading.Lock()
+    
+    # (ledger, coffees that have had orders in it) for queries across every
+    # coffee; replacing _all_orders starts a new registry
+    _ordered = (None, {})
+    
     def __init__(self, name):
         """
         Initialize a Coffee with a name.
@@ -17,6 +31,11 @@ class Coffee:
             TypeError: If name is not a string
         """
         self.name = name
+        # Shards (stores) this coffee has had orders in, as an insertion-ordered set;
+        # each holds this coffee's orders and price index for its orders
+        self._shards = {}
+        # Number of customers who ordered both this coffee and another one
+        self._co_orders = {}
     
     @property
     def name(self):
@@ -59,23 +78,215 @@ class Coffee:
         """
         return list(set([order.customer for order in self.orders()]))
     
-    def num_orders(self):
+    def num_orders(self, store=None):
         """
         Get the total number of times this coffee has been ordered.
         
+        Args:
+            store (Store, StoreRegistry or Snapshot, optional): Count orders
+                from one store, all stores of a registry, or a snapshot
+            
         Returns:
             int: Total number of orders for this coffee
         """
+        if store is not None:
+            return store.coffee_totals(self)[1]
         return len(self.orders())
     
-    def average_price(self):
+    def average_price(self, store=None):
         """
         Get the average price at which this coffee has been ordered.
         
+        Args:
+            store (Store, StoreRegistry or Snapshot, optional): Average orders
+                from one store, all stores of a registry, or a snapshot
+            
         Returns:
             float: Average price of orders for this coffee, or 0 if no orders
         """
+        if store is not None:
+            total, count = store.coffee_totals(self)
+            return total / (100 * count) if count else 0
         orders = self.orders()
         if not orders:
             return 0
-        return sum(order.price for order in orders) / len(orders)
+        # Sum in integer cents so the average is exact before the final division
+        return sum(order.price_cents for order in orders) / (100 * len(orders))
+    
+    def also_ordered(self, k=5):
+        """
+        Get the coffees most often ordered by customers of this coffee.
+        
+        Results come from an incrementally maintained co-purchase index,
+        so the cost depends on the number of related coffees only.
+        
+        Args:
+            k (int): Maximum number of coffees to return
+            
+        Returns:
+            list: Up to k Coffee instances, most shared customers first
+        """
+        # Copy the counts first so concurrent orders cannot resize the dict mid-scan
+        co_orders = self._co_orders.copy()
+        return heapq.nlargest(k, co_orders, key=co_orders.get)
+    
+    def count_between(self, low, high):
+        """
+        Count orders for this coffee within a price range.
+        
+        Args:
+            low (float): Lowest price, inclusive
+            high (float): Highest price, inclusive
+            
+        Returns:
+            int: Number of orders priced between low and high
+        """
+        return self._price_count(round(low * 100), round(high * 100))
+    
+    def orders_between(self, low, high):
+        """
+        Get orders for this coffee within a price range.
+        
+        Args:
+            low (float): Lowest price, inclusive
+            high (float): Highest price, inclusive
+            
+        Returns:
+            list: Order instances priced between low and high, cheapest first
+        """
+        return [entry[2] for entry in self._price_slice(round(low * 100), round(high * 100))]
+    
+    def price_percentile(self, percent):
+        """
+        Get the price at a percentile of this coffee's orders (nearest rank).
+        
+        Args:
+            percent (float): Percentile between 0 and 100
+            
+        Returns:
+            float: The price at that percentile, or 0 if no orders
+            
+        Raises:
+            ValueError: If percent is not between 0 and 100
+        """
+        if percent < 0 or percent > 100:
+            raise ValueError("Percent must be between 0 and 100.")
+        shards = list(self._shards)
+        bounds = [b for b in (shard._price_bounds(self) for shard in shards) if b]
+        if not bounds:
+            return 0
+        rank = max(1, math.ceil(percent / 100 * self._price_count(-math.inf, math.inf)))
+        # Find the lowest price with at least rank orders at or below it by
+        # bisecting prices, so no shard's index has to be merged
+        low, high = min(b[0] for b in bounds), max(b[1] for b in bounds)
+        while low < high:
+            middle = (low + high) // 2
+            if self._price_count(-math.inf, middle) >= rank:
+                high = middle
+            else:
+                low = middle + 1
+        return low / 100
+    
+    def orders_above_percentile(self, percent):
+        """
+        Get orders for this coffee priced above a percentile.
+        
+        Args:
+            percent (float): Percentile between 0 and 100
+            
+        Returns:
+            list: Order instances priced above that percentile, cheapest first
+            
+        Raises:
+            ValueError: If percent is not between 0 and 100
+        """
+        threshold = round(self.price_percentile(percent) * 100)
+        return [entry[2] for entry in self._price_slice(threshold + 1, math.inf)]
+    
+    @classmethod
+    def _ordered_coffees(cls):
+        """
+        Get the coffees that have had orders in the current ledger.
+        
+        Returns:
+            list: Coffee instances, in order of their first order
+        """
+        ledger, coffees = Coffee._ordered
+        return list(coffees) if ledger is Coffee._all_orders else []
+    
+    def _indexed_orders(self):
+        """
+        Get this coffee's orders from the index of every shard holding them.
+        
+        Returns:
+            list: Order instances, in order of creation
+        """
+        orders = [order for shard in list(self._shards) for order in shard._orders_of(self)]
+        orders.sort(key=attrgetter("id"))
+        return orders
+    
+    def _indexed_count(self):
+        """
+        Count this coffee's orders across every shard holding them.
+        
+        Returns:
+            int: Number of orders
+        """
+        return sum(shard._count_of(self) for shard in list(self._shards))
+    
+    def _price_count(self, low, high):
+        """
+        Count this coffee's orders within a cents range across every shard.
+        
+        Args:
+            low (int): Lowest price in cents
+            high (int): Highest price in cents
+            
+        Returns:
+            int: Number of orders priced between low and high
+        """
+        return sum(shard._price_count(self, low, high) for shard in list(self._shards))
+    
+    def _price_slice(self, low, high):
+        """
+        Get this coffee's price index entries within a cents range, merged across shards.
+        
+        Args:
+            low (int): Lowest price in cents
+            high (int): Highest price in cents
+            
+        Returns:
+            list: (price_cents, id, order) entries, cheapest first
+        """
+        slices = [shard._price_slice(self, low, high) for shard in list(self._shards)]
+        return slices[0] if len(slices) == 1 else list(heapq.merge(*slices))
+    
+    def _mark_ordered(self):
+        """Register this coffee as ordered in the current ledger."""
+        ledger, coffees = Coffee._ordered
+        if ledger is not Coffee._all_orders:
+            coffees = {}
+            Coffee._ordered = (Coffee._all_orders, coffees)
+        coffees[self] = None
+    
+    def _link(self, other):
+        """
+        Increment the co-purchase count between this coffee and another.
+        
+        Args:
+            other (Coffee): The related coffee
+        """
+        self._co_orders[other] = self._co_orders.get(other, 0) + 1
+    
+    def _unlink(self, other):
+        """
+        Decrement the co-purchase count between this coffee and another.
+        
+        Args:
+            other (Coffee): The related coffee
+        """
+        count = self._co_orders[other] - 1
+        if count:
+            self._co_orders[other] = count
+        else:
+            del self._co_orders[other]
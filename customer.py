@@ -1,3 +1,25 @@
+import threading
+from operator import attrgetter
+
+from idempotency import IdempotencyCache
+
+
+def _load_order_factory(*args):
+    """
+    Import the order module on first use and create an Order.
+    
+    Importing order replaces Customer._order_factory with the Order class,
+    so later orders skip this function entirely.
+    
+    Args:
+        *args: Arguments for Order
+    
+    Returns:
+        Order: The new order
+    """
+    import order
+    return order.Order(*args)
+
 
 class Customer:
     """Represents a coffee shop customer."""
@@ -5,6 +27,18 @@ class Customer:
     # Class variable to store all orders across all customers
     _all_orders = []
     
+    # Recently used idempotency keys for create_order
+    _idempotency = IdempotencyCache()
+    
+    # Guards the co-purchase counts, which link coffees across every store
+    _co_purchase_lock = threading.Lock()
+    
+    # Creates orders. Customer and Order still depend on each other (Order
+    # validates its customer), so order.py installs the Order class here when
+    # imported instead of this module importing order; until then the stub
+    # imports it on the first order
+    _order_factory = staticmethod(_load_order_factory)
+    
     def __init__(self, name):
         """
         Initialize a Customer with a name.
@@ -17,6 +51,10 @@ class Customer:
             TypeError: If name is not a string
         """
         self.name = name
+        # Shards (stores) this customer has had orders in, as an insertion-ordered set
+        self._shards = {}
+        # Number of shards holding orders per coffee, used to maintain the co-purchase index
+        self._coffee_shards = {}
     
     @property
     def name(self):
@@ -59,32 +97,115 @@ class Customer:
         """
         return list(set([order.coffee for order in self.orders()]))
     
-    def create_order(self, coffee, price):
+    def _indexed_orders(self):
+        """
+        Get this customer's orders from the index of every shard holding them.
+        
+        Returns:
+            list: Order instances, in order of creation
+        """
+        orders = [order for shard in list(self._shards) for order in shard._orders_of(self)]
+        orders.sort(key=attrgetter("id"))
+        return orders
+    
+    def _indexed_count(self):
+        """
+        Count this customer's orders across every shard holding them.
+        
+        Returns:
+            int: Number of orders
+        """
+        return sum(shard._count_of(self) for shard in list(self._shards))
+    
+    def _add_coffee(self, coffee):
+        """
+        Record that a shard now holds this customer's first order there for a coffee.
+        
+        When the customer has not ordered the coffee in any other shard, the
+        co-purchase counts between that coffee and every other coffee already
+        in the customer's set are incremented. Shards call this only for a
+        first order, so most orders never take the co-purchase lock.
+        
+        Args:
+            coffee (Coffee): The coffee ordered
+        """
+        with Customer._co_purchase_lock:
+            count = self._coffee_shards.get(coffee, 0)
+            if count == 0:
+                for other in self._coffee_shards:
+                    other._link(coffee)
+                    coffee._link(other)
+            self._coffee_shards[coffee] = count + 1
+    
+    def _remove_coffee(self, coffee):
+        """
+        Record that a shard no longer holds any of this customer's orders for a coffee.
+        
+        When no shard holds such an order any more, the co-purchase counts
+        with the remaining coffees are decremented.
+        
+        Args:
+            coffee (Coffee): The coffee no longer ordered in the shard
+        """
+        with Customer._co_purchase_lock:
+            count = self._coffee_shards[coffee] - 1
+            if count:
+                self._coffee_shards[coffee] = count
+                return
+            del self._coffee_shards[coffee]
+            for other in self._coffee_shards:
+                other._unlink(coffee)
+                coffee._unlink(other)
+    
+    def create_order(self, coffee, price, store=None, idempotency_key=None):
         """
         Create a new order for this customer.
         
         Args:
             coffee (Coffee): The coffee to order
             price (float): The price of the order (1.0-10.0)
+            store (Store, optional): The store the order is placed at
+            idempotency_key (hashable, optional): Unique key for this sale;
+                a retried submission with the same key returns the order
+                created the first time instead of creating a duplicate
             
         Returns:
-            Order: The newly created Order instance
+            Order: The newly created Order instance, or the earlier order
+                created with the same idempotency key
+            
+        Raises:
+            ValueError: If the order is invalid, or idempotency_key was
+                already used for a different customer, coffee, price or store
         """
-        from order import Order
-        new_order = Order(self, coffee, price)
+        factory = Customer._order_factory
+        if idempotency_key is not None:
+            order, _ = Customer._idempotency.get_or_create(
+                idempotency_key, lambda: factory(self, coffee, price, store),
+                fingerprint=(self, coffee, price, store),
+            )
+            return order
+        new_order = factory(self, coffee, price, store)
         return new_order
     
     @classmethod
-    def most_aficionado(cls, coffee):
+    def most_aficionado(cls, coffee, store=None):
         """
         Find the customer who has spent the most money on a given coffee.
         
         Args:
             coffee (Coffee): The coffee to check
+            store (Store, StoreRegistry or Snapshot, optional): Restrict the
+                search to one store, all stores of a registry, or a snapshot
             
         Returns:
             Customer: The customer with highest spending on this coffee, or None
         """
+        if store is not None:
+            customer_spending = store.coffee_spending(coffee)
+            if not customer_spending:
+                return None
+            return max(customer_spending, key=customer_spending.get)
+        
         coffee_orders = [order for order in cls._all_orders if order.coffee == coffee]
         
         if not coffee_orders:
@@ -95,7 +216,39 @@ class Customer:
         for order in coffee_orders:
             if order.customer not in customer_spending:
                 customer_spending[order.customer] = 0
-            customer_spending[order.customer] += order.price
+            customer_spending[order.customer] += order.price_cents
         
         # Return the customer with the highest spending
         return max(customer_spending, key=customer_spending.get)
+    
+    @classmethod
+    def most_aficionado_all(cls, coffees=None):
+        """
+        Find the top-spending customer for every coffee in one pass over the orders.
+        
+        Ties are broken as in most_aficionado: the tied customer whose first
+        order for the coffee came earliest wins.
+        
+        Args:
+            coffees (iterable, optional): Coffees to include (defaults to every
+                coffee that has been ordered)
+            
+        Returns:
+            dict: Coffee to the Customer with highest spending on it, or None
+                for requested coffees without orders
+        """
+        wanted = None if coffees is None else dict.fromkeys(coffees)
+        spending = {} if wanted is None else {coffee: {} for coffee in wanted}
+        for order in cls._all_orders:
+            coffee = order.coffee
+            if wanted is not None and coffee not in wanted:
+                continue
+            customer_spending = spending.get(coffee)
+            if customer_spending is None:
+                customer_spending = spending[coffee] = {}
+            customer = order.customer
+            customer_spending[customer] = customer_spending.get(customer, 0) + order.price_cents
+        return {
+            coffee: max(customer_spending, key=customer_spending.get) if customer_spending else None
+            for coffee, customer_spending in spending.items()
+        }
@@ -2,8 +2,17 @@
 """
 Debug script for testing the Coffee Shop domain model.
 Use this file to interactively test the functionality of Customer, Coffee, and Order classes.
+
+Run "python debug.py --memory [options]" to print a memory profile instead
+(see memprofile.py for the options).
 """
 
+import sys
+
+if len(sys.argv) > 1 and sys.argv[1] == "--memory":
+    from memprofile import main
+    sys.exit(main(sys.argv[2:]))
+
 from customer import Customer
 from coffee import Coffee
 from order import Order
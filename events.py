@@ -0,0 +1,280 @@
+
+"""
+Change-data-capture stream for orders.
+
+Order publishes an event to the module-level bus whenever an order is created
+or one of its fields changes. Subscribers read from bounded queues that never
+block the publisher:
+
+sub = bus.subscribe(maxsize=1000)
+for event in sub.drain():
+    ...
+"""
+
+import threading
+from collections import deque, namedtuple
+from itertools import count
+
+CREATED = "created"
+CHANGED = "changed"
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+POLICIES = (DROP_OLDEST, DROP_NEWEST)
+
+# For changed events, field is customer, coffee or price and old is the
+# previous customer, coffee or price in cents; both are None for created events
+OrderEvent = namedtuple(
+    "OrderEvent", "seq kind order_id customer coffee price_cents field old"
+)
+
+
+class Subscription:
+    """A bounded, non-blocking queue of order events for one consumer."""
+    
+    def __init__(self, bus, maxsize=1024, policy=DROP_OLDEST):
+        """
+        Initialize a Subscription.
+        
+        Args:
+            bus (EventBus): The bus delivering events
+            maxsize (int): Maximum number of queued events
+            policy (str): What to do when the queue is full: drop_oldest or drop_newest
+        
+        Raises:
+            ValueError: If maxsize is not positive or the policy is unknown
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1.")
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {', '.join(POLICIES)}.")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0
+        self._bus = bus
+        self._queue = deque()
+        self._ready = threading.Condition(threading.Lock())
+        self._async_waiters = []
+    
+    def __len__(self):
+        """Get the number of queued events."""
+        return len(self._queue)
+    
+    @property
+    def full(self):
+        """Whether the queue is full, so the next event will be dropped."""
+        return len(self._queue) >= self.maxsize
+    
+    def poll(self):
+        """
+        Get the next event without waiting.
+        
+        Returns:
+            OrderEvent: The next event, or None if the queue is empty
+        """
+        with self._ready:
+            return self._queue.popleft() if self._queue else None
+    
+    def drain(self, max_items=None):
+        """
+        Get all queued events without waiting.
+        
+        Args:
+            max_items (int, optional): Maximum number of events to return
+        
+        Returns:
+            list: Queued OrderEvent instances, oldest first
+        """
+        with self._ready:
+            queue = self._queue
+            n = len(queue) if max_items is None else min(max_items, len(queue))
+            return [queue.popleft() for _ in range(n)]
+    
+    def get(self, timeout=None):
+        """
+        Wait for the next event, for use from a consumer thread.
+        
+        Args:
+            timeout (float, optional): Seconds to wait (None waits forever)
+        
+        Returns:
+            OrderEvent: The next event, or None if the timeout expired
+        """
+        with self._ready:
+            if not self._ready.wait_for(lambda: self._queue, timeout):
+                return None
+            return self._queue.popleft()
+    
+    async def aget(self):
+        """
+        Wait for the next event, for use from an asyncio consumer.
+        
+        Returns:
+            OrderEvent: The next event
+        """
+        # Imported here so creating orders does not pay for loading asyncio;
+        # a running coroutine means it is already in sys.modules
+        import asyncio
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._ready:
+                if self._queue:
+                    return self._queue.popleft()
+                waiter = loop.create_future()
+                entry = (loop, waiter)
+                self._async_waiters.append(entry)
+            try:
+                await waiter
+            finally:
+                # A cancelled or timed-out wait must not outlive its loop
+                with self._ready:
+                    if entry in self._async_waiters:
+                        self._async_waiters.remove(entry)
+    
+    def close(self):
+        """Stop receiving events."""
+        self._bus.unsubscribe(self)
+    
+    def _offer(self, event):
+        """
+        Queue an event, applying the drop policy if the queue is full.
+        
+        Args:
+            event (OrderEvent): The event to queue
+        """
+        with self._ready:
+            if len(self._queue) >= self.maxsize:
+                self.dropped += 1
+                if self.policy == DROP_NEWEST:
+                    return
+                self._queue.popleft()
+            self._queue.append(event)
+            self._ready.notify()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:
+                # The consumer's loop is closed; never fail the publishing writer
+                pass
+
+
+def _wake(waiter):
+    """
+    Resolve an asyncio waiter unless it was cancelled.
+    
+    Args:
+        waiter (asyncio.Future): The waiter to resolve
+    """
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class ThreadedConsumer:
+    """Calls a handler for each event of a subscription on a background thread."""
+    
+    def __init__(self, subscription, handler, poll_interval=0.1):
+        """
+        Initialize and start a ThreadedConsumer.
+        
+        Args:
+            subscription (Subscription): The subscription to read
+            handler (callable): Called with each OrderEvent
+            poll_interval (float): Seconds between checks for stop()
+        """
+        self.subscription = subscription
+        self.handler = handler
+        self.poll_interval = poll_interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self, drain=True):
+        """
+        Stop the consumer thread.
+        
+        Args:
+            drain (bool): Handle the events still queued before stopping
+        """
+        self._stopped.set()
+        self._thread.join()
+        if drain:
+            for event in self.subscription.drain():
+                self.handler(event)
+    
+    def _run(self):
+        """Handle events until stopped."""
+        while not self._stopped.is_set():
+            event = self.subscription.get(self.poll_interval)
+            if event is not None:
+                self.handler(event)
+
+
+class EventBus:
+    """Publishes order events to every subscription."""
+    
+    def __init__(self):
+        """Initialize a bus with no subscribers."""
+        self._lock = threading.Lock()
+        self._seq = count(1)
+        # Replaced, never mutated, so publish() can iterate without locking
+        self._subscriptions = ()
+    
+    def subscribe(self, maxsize=1024, policy=DROP_OLDEST):
+        """
+        Start receiving order events.
+        
+        Args:
+            maxsize (int): Maximum number of queued events
+            policy (str): drop_oldest or drop_newest when the queue is full
+        
+        Returns:
+            Subscription: The new subscription
+        """
+        subscription = Subscription(self, maxsize, policy)
+        with self._lock:
+            self._subscriptions = self._subscriptions + (subscription,)
+        return subscription
+    
+    def unsubscribe(self, subscription):
+        """
+        Stop delivering events to a subscription.
+        
+        Args:
+            subscription (Subscription): The subscription to remove
+        """
+        with self._lock:
+            self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+    
+    def saturated(self):
+        """
+        Check for backpressure from slow consumers.
+        
+        Returns:
+            bool: True if any subscription's queue is full
+        """
+        return any(s.full for s in self._subscriptions)
+    
+    def publish(self, kind, order, field=None, old=None):
+        """
+        Publish an event for an order to every subscription.
+        
+        Args:
+            kind (str): created or changed
+            order (Order): The order the event is about
+            field (str, optional): The changed field
+            old (object, optional): The field's previous value
+        """
+        subscriptions = self._subscriptions
+        if not subscriptions:
+            return
+        event = OrderEvent(
+            next(self._seq), kind, order.id, order.customer, order.coffee,
+            order.price_cents, field, old,
+        )
+        for subscription in subscriptions:
+            subscription._offer(event)
+
+
+# Bus used by Order
+bus = EventBus()
@@ -0,0 +1,219 @@
+
+"""
+Bounded-memory duplicate detection for order submission.
+
+IdempotencyCache remembers the order created for each idempotency key for a
+time window, keeping at most `capacity` keys and evicting the oldest first
+(FIFO by first submission). Orders are created outside the cache lock, so only
+concurrent submissions of the same key wait for each other. Optionally,
+lookups for unseen keys are answered by two rotating Bloom filters before
+touching the table; in CPython the dict lookup is cheaper than hashing a key
+several times, so this is off by default (see benchmarks/bench_idempotency.py).
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class BloomFilter:
+    """A fixed-size Bloom filter over hashable keys."""
+    
+    def __init__(self, capacity, error_rate=0.01):
+        """
+        Initialize a BloomFilter sized for a number of keys.
+        
+        Args:
+            capacity (int): Expected number of keys
+            error_rate (float): Target false positive rate at capacity
+        
+        Raises:
+            ValueError: If capacity is not positive or error_rate is not in (0, 1)
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1.")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1.")
+        bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.num_bits = max(8, bits)
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+    
+    def _positions(self, key):
+        """
+        Get the bit positions for a key using double hashing.
+        
+        Args:
+            key (object): A hashable key
+        
+        Returns:
+            list: Bit positions
+        """
+        h1 = hash(key)
+        h2 = hash((key, 0x9E3779B9)) | 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+    
+    def add(self, key):
+        """
+        Add a key.
+        
+        Args:
+            key (object): A hashable key
+        """
+        bits = self._bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+    
+    def __contains__(self, key):
+        """Check whether a key may have been added (no false negatives)."""
+        bits = self._bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+    
+    def clear(self):
+        """Remove all keys."""
+        self._bits = bytearray(len(self._bits))
+
+
+class IdempotencyCache:
+    """Maps recent idempotency keys to the orders they created."""
+    
+    def __init__(self, capacity=100000, window=3600.0, bloom=False, clock=time.monotonic):
+        """
+        Initialize an IdempotencyCache.
+        
+        Args:
+            capacity (int): Maximum number of keys remembered
+            window (float): Seconds a key is remembered for
+            bloom (bool): Screen unseen keys with Bloom filters before the table
+            clock (callable): Returns the current time in seconds
+        
+        Raises:
+            ValueError: If capacity or window is not positive
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1.")
+        if window <= 0:
+            raise ValueError("window must be positive.")
+        self.capacity = capacity
+        self.window = window
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (time, order, fingerprint), oldest first
+        self._recent = OrderedDict()
+        # key -> lock held while the submission creating it is in flight
+        self._pending = {}
+        # Keys added in the current and previous window, rotated every window
+        self._filters = (BloomFilter(capacity), BloomFilter(capacity)) if bloom else None
+        self._rotated_at = clock()
+    
+    def __len__(self):
+        """Get the number of remembered keys."""
+        return len(self._recent)
+    
+    def get_or_create(self, key, create, fingerprint=None):
+        """
+        Get the order remembered for a key, or create and remember one.
+        
+        Args:
+            key (object): A hashable idempotency key
+            create (callable): Called with no arguments to create the order
+            fingerprint (object, optional): Describes the submission; a retry
+                with the same key must have an equal fingerprint
+        
+        Returns:
+            tuple: (order, True if it was created by this call)
+        
+        Raises:
+            ValueError: If the key was used for a submission with a different fingerprint
+        """
+        while True:
+            with self._lock:
+                now = self._clock()
+                entry = self._lookup(key, now)
+                if entry is not None:
+                    if entry[2] != fingerprint:
+                        raise ValueError(f"Idempotency key {key!r} was already used for a different order.")
+                    return entry[1], False
+                pending = self._pending.get(key)
+                if pending is None:
+                    done = self._pending[key] = threading.Lock()
+                    done.acquire()
+                    break
+            # Another submission with this key is in flight; wait and use its result
+            with pending:
+                pass
+        try:
+            order = create()
+        except BaseException:
+            with self._lock:
+                del self._pending[key]
+            done.release()
+            raise
+        with self._lock:
+            self._remember(key, order, fingerprint, self._clock())
+            del self._pending[key]
+        done.release()
+        return order, True
+    
+    def _lookup(self, key, now):
+        """
+        Find the order remembered for a key within the window.
+        
+        Args:
+            key (object): The idempotency key
+            now (float): Current time
+        
+        Returns:
+            tuple: The remembered (time, order, fingerprint) entry, or None
+        """
+        filters = self._filters
+        if filters is not None:
+            self._rotate(now)
+            if key not in filters[0] and key not in filters[1]:
+                return None
+        entry = self._recent.get(key)
+        if entry is None:
+            return None
+        if now - entry[0] > self.window:
+            del self._recent[key]
+            return None
+        return entry
+    
+    def _remember(self, key, order, fingerprint, now):
+        """
+        Remember the order created for a key, evicting the oldest keys.
+        
+        Args:
+            key (object): The idempotency key
+            order (Order): The created order
+            fingerprint (object): Describes the submission
+            now (float): Current time
+        """
+        recent = self._recent
+        recent[key] = (now, order, fingerprint)
+        if self._filters is not None:
+            self._filters[0].add(key)
+        while len(recent) > self.capacity:
+            recent.popitem(last=False)
+        # Expired keys are at the front because entries are added in time order
+        while recent:
+            oldest = next(iter(recent.values()))
+            if now - oldest[0] <= self.window:
+                break
+            recent.popitem(last=False)
+    
+    def _rotate(self, now):
+        """
+        Start a new Bloom filter generation once per window.
+        
+        Args:
+            now (float): Current time
+        """
+        if now - self._rotated_at < self.window:
+            return
+        current, previous = self._filters
+        previous.clear()
+        self._filters = (previous, current)
+        self._rotated_at = now
@@ -0,0 +1,203 @@
+
+"""
+Load generator for the Coffee Shop HTTP/JSON service.
+Drives server.py over keep-alive connections and reports latency and throughput:
+
+python loadgen.py --concurrency 32 --requests 20000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from server import ShopServer
+
+CUSTOMER_NAMES = ["Alice", "Bob", "Charlie", "Dana", "Eve", "Frank", "Grace", "Heidi"]
+COFFEE_NAMES = ["Espresso", "Cappuccino", "Latte", "Mocha", "Americano"]
+QUERIES = ["average_price", "customers", "most_aficionado"]
+
+
+class Client:
+    """Minimal HTTP/1.1 JSON client reusing one keep-alive connection."""
+    
+    def __init__(self, host, port):
+        """
+        Initialize a Client.
+        
+        Args:
+            host (str): Server host
+            port (int): Server port
+        """
+        self.host = host
+        self.port = port
+        self._reader = None
+        self._writer = None
+    
+    async def connect(self):
+        """Open the connection."""
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+    
+    async def close(self):
+        """Close the connection."""
+        self._writer.close()
+        await self._writer.wait_closed()
+    
+    async def request(self, method, path, payload=None):
+        """
+        Send one request and read its response.
+        
+        Args:
+            method (str): HTTP method
+            path (str): Request path
+            payload (object, optional): JSON-serializable request body
+        
+        Returns:
+            tuple: (status, decoded JSON body)
+        """
+        body = json.dumps(payload).encode() if payload is not None else b""
+        head = (
+            f"{method} {path} HTTP/1.1\r\n"
+            f"Host: {self.host}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n"
+        )
+        self._writer.write(head.encode() + body)
+        await self._writer.drain()
+        response_head = await self._reader.readuntil(b"\r\n\r\n")
+        lines = response_head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split(" ", 2)[1])
+        length = 0
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self._reader.readexactly(length))
+
+
+def percentile(sorted_values, fraction):
+    """
+    Get a percentile using the nearest-rank method.
+    
+    Args:
+        sorted_values (list): Values in ascending order
+        fraction (float): Percentile as a fraction (0.5 for p50)
+    
+    Returns:
+        float: The percentile value, or 0 if there are no values
+    """
+    if not sorted_values:
+        return 0
+    rank = max(1, round(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def run_load(host, port, concurrency=16, requests=5000, write_ratio=0.5, seed=0):
+    """
+    Drive the server with a mix of order creation and coffee queries.
+    
+    Args:
+        host (str): Server host
+        port (int): Server port
+        concurrency (int): Number of concurrent keep-alive connections
+        requests (int): Total number of requests to send
+        write_ratio (float): Fraction of requests that create orders
+        seed (int): Random seed for the request mix
+    
+    Returns:
+        dict: requests, errors, seconds, rps, p50_ms and p99_ms
+    """
+    rng = random.Random(seed)
+    latencies = []
+    errors = 0
+    remaining = requests
+    
+    async def worker():
+        nonlocal errors, remaining
+        client = Client(host, port)
+        await client.connect()
+        try:
+            while remaining > 0:
+                remaining -= 1
+                coffee = rng.choice(COFFEE_NAMES)
+                if rng.random() < write_ratio:
+                    method, path = "POST", "/orders"
+                    payload = {
+                        "customer": rng.choice(CUSTOMER_NAMES),
+                        "coffee": coffee,
+                        "price": round(rng.uniform(1.0, 10.0), 2),
+                    }
+                else:
+                    method, path, payload = "GET", f"/coffees/{coffee}/{rng.choice(QUERIES)}", None
+                start = time.perf_counter()
+                status, _ = await client.request(method, path, payload)
+                latencies.append(time.perf_counter() - start)
+                # Queries for a coffee nobody has ordered yet are expected 404s
+                if status >= 400 and status != 404:
+                    errors += 1
+        finally:
+            await client.close()
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed if elapsed else 0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+async def run_against_local_server(**options):
+    """
+    Start an in-process server on a free port and drive it.
+    
+    Args:
+        **options: Keyword arguments passed to run_load
+    
+    Returns:
+        dict: The load test results
+    """
+    server = ShopServer(port=0)
+    await server.start()
+    try:
+        return await run_load(server.host, server.port, **options)
+    finally:
+        await server.close()
+
+
+def main():
+    """Run the load generator from the command line."""
+    parser = argparse.ArgumentParser(description="Load test the coffee shop HTTP service.")
+    parser.add_argument("--host", help="Server host (default: start a local server)")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--write-ratio", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    options = {
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "write_ratio": args.write_ratio,
+        "seed": args.seed,
+    }
+    if args.host:
+        results = asyncio.run(run_load(args.host, args.port, **options))
+    else:
+        results = asyncio.run(run_against_local_server(**options))
+    print(f"requests: {results['requests']}")
+    print(f"errors:   {results['errors']}")
+    print(f"seconds:  {results['seconds']:.3f}")
+    print(f"rps:      {results['rps']:.0f}")
+    print(f"p50:      {results['p50_ms']:.3f} ms")
+    print(f"p99:      {results['p99_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+
+"""
+Memory profiling for the Coffee Shop domain model.
+Builds a shop of configurable size and reports tracemalloc measurements as
+sorted "key value" lines so two reports can be diffed:
+
+python debug.py --memory --customers 1000 --coffees 20 --orders 100000
+"""
+
+import argparse
+import random
+import sys
+import tracemalloc
+
+from customer import Customer
+from coffee import Coffee
+from order import Order
+
+
+def _measure(func):
+    """
+    Run a function under tracemalloc.
+    
+    Args:
+        func (callable): Function to run
+    
+    Returns:
+        tuple: (result, bytes still allocated afterwards, peak bytes during the call)
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = func()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, current - before, peak - before
+
+
+def profile_shop(customers=1000, coffees=20, orders=100000, seed=0):
+    """
+    Build a shop and measure its memory use.
+    
+    Args:
+        customers (int): Number of customers to create
+        coffees (int): Number of coffees to create
+        orders (int): Number of orders to create
+        seed (int): Random seed for the order mix
+    
+    Returns:
+        dict: Measurement name to integer number of bytes
+    
+    Raises:
+        ValueError: If customers, coffees or orders is not positive
+    """
+    if min(customers, coffees, orders) < 1:
+        raise ValueError("customers, coffees and orders must be at least 1.")
+    Customer._all_orders = []
+    Coffee._all_orders = []
+    rng = random.Random(seed)
+    report = {}
+    
+    all_customers, size, _ = _measure(
+        lambda: [Customer(f"C{i}") for i in range(customers)]
+    )
+    report["customer.bytes_each"] = size // customers
+    all_coffees, size, _ = _measure(
+        lambda: [Coffee(f"Coffee {i}") for i in range(coffees)]
+    )
+    report["coffee.bytes_each"] = size // coffees
+    
+    picks = [
+        (rng.choice(all_customers), rng.choice(all_coffees), rng.randint(100, 1000) / 100)
+        for _ in range(orders)
+    ]
+    _, size, peak = _measure(lambda: [Order(*pick) for pick in picks])
+    # The list comprehension itself holds one reference per order
+    size -= sys.getsizeof([None] * orders)
+    ledger = sys.getsizeof(Customer._all_orders) + sys.getsizeof(Coffee._all_orders)
+    report["order.bytes_each"] = (size - ledger) // orders
+    report["order.peak_bytes_total"] = peak
+    
+    # Growing a list by appends over-allocates; compare with an exact-size list
+    _, grown, grow_peak = _measure(lambda: _grow_list(orders))
+    report["all_orders.bytes_per_order"] = ledger // (2 * orders)
+    report["all_orders.growth_overhead_bytes"] = grown - sys.getsizeof([None] * orders)
+    report["all_orders.growth_peak_bytes"] = grow_peak
+    
+    coffee = max(all_coffees, key=lambda c: c.num_orders())
+    _, _, peak = _measure(coffee.orders)
+    report["query.coffee_orders.peak_bytes"] = peak
+    _, _, peak = _measure(coffee.customers)
+    report["query.coffee_customers.peak_bytes"] = peak
+    _, _, peak = _measure(coffee.average_price)
+    report["query.coffee_average_price.peak_bytes"] = peak
+    _, _, peak = _measure(lambda: Customer.most_aficionado(coffee))
+    report["query.most_aficionado.peak_bytes"] = peak
+    return report
+
+
+def _grow_list(size):
+    """
+    Build a list of the given size by appending, as the order ledgers do.
+    
+    Args:
+        size (int): Number of items to append
+    
+    Returns:
+        list: The grown list
+    """
+    items = []
+    for _ in range(size):
+        items.append(None)
+    return items
+
+
+def _positive_int(value):
+    """
+    Parse a command-line count that must be at least 1.
+    
+    Args:
+        value (str): The argument text
+    
+    Returns:
+        int: The parsed count
+    
+    Raises:
+        argparse.ArgumentTypeError: If value is not a positive integer
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: {value}")
+    return number
+
+
+def format_report(report, header=None):
+    """
+    Format a report as sorted "key value" lines.
+    
+    Args:
+        report (dict): Measurement name to number of bytes
+        header (str, optional): Comment line describing the run
+    
+    Returns:
+        str: The report text
+    """
+    lines = [f"# {header}"] if header else []
+    lines.extend(f"{key} {report[key]}" for key in sorted(report))
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    """
+    Run the memory profile from the command line.
+    
+    Args:
+        argv (list, optional): Command-line arguments
+    
+    Returns:
+        int: Exit status
+    """
+    parser = argparse.ArgumentParser(description="Report memory use of the coffee shop model.")
+    parser.add_argument("--customers", type=_positive_int, default=1000)
+    parser.add_argument("--coffees", type=_positive_int, default=20)
+    parser.add_argument("--orders", type=_positive_int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report to this file instead of stdout")
+    args = parser.parse_args(argv)
+    report = profile_shop(args.customers, args.coffees, args.orders, args.seed)
+    header = (
+        f"customers={args.customers} coffees={args.coffees} orders={args.orders} "
+        f"seed={args.seed} python={sys.version_info.major}.{sys.version_info.minor}"
+    )
+    text = format_report(report, header)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,26 @@
 
+import math
+from array import array
+from itertools import count
+
 from customer import Customer
 from coffee import Coffee
+from events import CHANGED, CREATED, bus
+from snapshot import preserve
+from store import Shard, Store
 
 
 class Order:
     """Represents an order placed at the coffee shop."""
     
-    def __init__(self, customer, coffee, price):
+    # Source of unique, increasing order ids
+    _ids = count(1)
+    
+    # (ledger, shard holding orders placed without a store); replacing
+    # _all_orders starts a new shard
+    _default_shard = (None, None)
+    
+    def __init__(self, customer, coffee, price, store=None):
         """
         Initialize an Order with customer, coffee, and price.
         
@@ -14,18 +28,66 @@ class Order:
             customer (Customer): The customer placing the order
             coffee (Coffee): The coffee being ordered
             price (float): The price of the order (must be 1.0-10.0)
+            store (Store, optional): The store the order was placed at
             
         Raises:
-            TypeError: If customer is not a Customer or coffee is not a Coffee
+            TypeError: If customer is not a Customer, coffee is not a Coffee,
+                or store is not a Store
             ValueError: If price is invalid
         """
+        if store is not None and not isinstance(store, Store):
+            raise TypeError("Store must be a Store instance.")
+        self._store = store
+        self._shard = store if store is not None else Order._storeless_shard()
+        self._indexed = False
         self.customer = customer
         self.coffee = coffee
         self.price = price
         
-        # Register order in both Customer and Coffee tracking lists
-        Customer._all_orders.append(self)
-        Coffee._all_orders.append(self)
+        # Register order in both Customer and Coffee tracking lists. Only this
+        # order's shard is locked, so orders at other stores proceed in parallel;
+        # the id is taken at the append so a snapshot's last id bounds its ledger
+        with self._shard._lock:
+            with Coffee._ledger_lock:
+                self._id = next(Order._ids)
+                Customer._all_orders.append(self)
+                Coffee._all_orders.append(self)
+            self._index()
+            bus.publish(CREATED, self)
+    
+    @staticmethod
+    def _storeless_shard():
+        """
+        Get the shard for orders placed without a store.
+        
+        Returns:
+            Shard: The shard belonging to the current ledger
+        """
+        ledger, shard = Order._default_shard
+        if ledger is not Coffee._all_orders:
+            shard = Shard()
+            Order._default_shard = (Coffee._all_orders, shard)
+        return shard
+    
+    def _index(self):
+        """Add this order to its shard's indexes; the caller holds the shard's lock."""
+        self._shard._add(self)
+        self._indexed = True
+    
+    def _unindex(self):
+        """Remove this order from its shard's indexes; the caller holds the shard's lock."""
+        self._shard._remove(self)
+        self._indexed = False
+    
+    @property
+    def id(self):
+        """Get the unique id of this order."""
+        return self._id
+    
+    @property
+    def store(self):
+        """Get the store this order was placed at, or None."""
+        return self._store
     
     @property
     def customer(self):
@@ -45,7 +107,16 @@ class Order:
         """
         if not isinstance(value, Customer):
             raise TypeError("Customer must be a Customer instance.")
-        self._customer = value
+        if not self._indexed:
+            self._customer = value
+            return
+        with self._shard._lock:
+            preserve(self)
+            previous = self._customer
+            self._unindex()
+            self._customer = value
+            self._index()
+            bus.publish(CHANGED, self, "customer", previous)
     
     @property
     def coffee(self):
@@ -65,18 +136,34 @@ class Order:
         """
         if not isinstance(value, Coffee):
             raise TypeError("Coffee must be a Coffee instance.")
-        self._coffee = value
+        if not self._indexed:
+            self._coffee = value
+            return
+        with self._shard._lock:
+            preserve(self)
+            previous = self._coffee
+            self._unindex()
+            self._coffee = value
+            self._index()
+            bus.publish(CHANGED, self, "coffee", previous)
     
     @property
     def price(self):
         """Get the price of this order."""
-        return self._price
+        return self._price_cents / 100
+    
+    @property
+    def price_cents(self):
+        """Get the price of this order in integer cents."""
+        return self._price_cents
     
     @price.setter
     def price(self, value):
         """
         Set the price of this order with validation.
         
+        The price is stored as integer cents so totals and averages are exact.
+        
         Args:
             value (float): The price (must be between 1.0 and 10.0)
             
@@ -86,6 +173,49 @@ class Order:
         """
         if not isinstance(value, (int, float)):
             raise TypeError("Price must be a number.")
-        if value < 1.0 or value > 10.0:
+        # NaN fails both range comparisons, so check finiteness explicitly
+        if not math.isfinite(value) or value < 1.0 or value > 10.0:
             raise ValueError("Price must be between 1.0 and 10.0.")
-        self._price = value
+        cents = round(value * 100)
+        if not self._indexed:
+            self._price_cents = cents
+            return
+        with self._shard._lock:
+            preserve(self)
+            previous = self._price_cents
+            self._unindex()
+            self._price_cents = cents
+            self._index()
+            bus.publish(CHANGED, self, "price", previous)
+    
+    @classmethod
+    def price_cents_array(cls, orders=None):
+        """
+        Get order prices as a compact integer column.
+        
+        Args:
+            orders (iterable, optional): Orders to include (defaults to all orders)
+            
+        Returns:
+            array: array('q') of prices in cents
+        """
+        if orders is None:
+            orders = Coffee._all_orders
+        return array("q", [order._price_cents for order in orders])
+    
+    @classmethod
+    def total_price(cls, orders=None):
+        """
+        Get the exact total price of many orders.
+        
+        Args:
+            orders (iterable, optional): Orders to include (defaults to all orders)
+            
+        Returns:
+            float: Total price, summed in integer cents
+        """
+        return sum(cls.price_cents_array(orders)) / 100
+
+
+# Let Customer.create_order build orders without importing this module per call
+Customer._order_factory = Order
@@ -0,0 +1,289 @@
+
+"""
+Index-aware queries over orders.
+
+Example:
+    from query import orders
+    orders.where(coffee=espresso, price_between=(2, 4)).group_by("customer").sum("price")
+"""
+
+import heapq
+
+from coffee import Coffee
+
+GROUP_FIELDS = ("customer", "coffee", "store")
+
+# Filters answered by each index
+INDEX_FILTERS = {
+    "customer": ("customer",),
+    "coffee": ("coffee",),
+    "price": ("price_between",),
+    "coffee_price": ("coffee", "price_between"),
+}
+
+
+class Plan:
+    """Describes how a query reads its candidate orders."""
+    
+    def __init__(self, index, key, rows, residual):
+        """
+        Initialize a Plan.
+        
+        Args:
+            index (str): Index used: "customer", "coffee", "price",
+                "coffee_price" or "scan"
+            key (object): The index key (customer, coffee, cents range, or
+                coffee and cents range)
+            rows (int): Number of candidate orders read from the index
+            residual (list): Filter names applied to each candidate
+        """
+        self.index = index
+        self.key = key
+        self.rows = rows
+        self.residual = residual
+
+
+class Query:
+    """An immutable query over orders, refined with where() and group_by()."""
+    
+    def __init__(self, filters=None, group=None):
+        """
+        Initialize a Query.
+        
+        Args:
+            filters (dict, optional): Filters by name (customer, coffee, price_between)
+            group (str, optional): Field to group results by
+        """
+        self._filters = dict(filters or {})
+        self._group = group
+    
+    def where(self, customer=None, coffee=None, price_between=None):
+        """
+        Narrow the query.
+        
+        Args:
+            customer (Customer, optional): Only orders placed by this customer
+            coffee (Coffee, optional): Only orders for this coffee
+            price_between (tuple, optional): Inclusive (low, high) price range
+        
+        Returns:
+            Query: A new query with the extra filters
+        
+        Raises:
+            ValueError: If price_between is not a (low, high) pair
+        """
+        filters = dict(self._filters)
+        if customer is not None:
+            filters["customer"] = customer
+        if coffee is not None:
+            filters["coffee"] = coffee
+        if price_between is not None:
+            low, high = price_between
+            if low > high:
+                raise ValueError("price_between must be a (low, high) pair.")
+            filters["price_between"] = (round(low * 100), round(high * 100))
+        return Query(filters, self._group)
+    
+    def group_by(self, field):
+        """
+        Group the results by a field.
+        
+        Args:
+            field (str): One of "customer", "coffee" or "store"
+        
+        Returns:
+            Query: A new grouped query
+        
+        Raises:
+            ValueError: If the field cannot be grouped by
+        """
+        if field not in GROUP_FIELDS:
+            raise ValueError(f"Can only group by one of {', '.join(GROUP_FIELDS)}.")
+        return Query(self._filters, field)
+    
+    def plan(self):
+        """
+        Choose the index that reads the fewest candidate orders.
+        
+        Returns:
+            Plan: The chosen plan
+        """
+        candidates = [("scan", None, len(Coffee._all_orders))]
+        if "customer" in self._filters:
+            customer = self._filters["customer"]
+            candidates.append(("customer", customer, customer._indexed_count()))
+        if "coffee" in self._filters:
+            coffee = self._filters["coffee"]
+            candidates.append(("coffee", coffee, coffee._indexed_count()))
+        if "price_between" in self._filters:
+            low, high = self._filters["price_between"]
+            rows = sum(c._price_count(low, high) for c in Coffee._ordered_coffees())
+            candidates.append(("price", (low, high), rows))
+            if "coffee" in self._filters:
+                rows = coffee._price_count(low, high)
+                candidates.append(("coffee_price", (coffee, low, high), rows))
+        # Prefer the smallest index; on ties prefer the one added last
+        index, key, rows = min(reversed(candidates), key=lambda c: c[2])
+        covered = INDEX_FILTERS.get(index, ())
+        residual = [name for name in self._filters if name not in covered]
+        return Plan(index, key, rows, residual)
+    
+    def explain(self):
+        """
+        Describe the chosen plan.
+        
+        Returns:
+            str: One line per plan step
+        """
+        plan = self.plan()
+        if plan.index == "scan":
+            lines = [f"scan all orders (~{plan.rows} rows)"]
+        elif plan.index == "price":
+            low, high = plan.key
+            lines = [f"index price {low / 100:.2f}..{high / 100:.2f} (~{plan.rows} rows)"]
+        elif plan.index == "coffee_price":
+            coffee, low, high = plan.key
+            lines = [
+                f"index coffee_price {coffee.name} {low / 100:.2f}..{high / 100:.2f} "
+                f"(~{plan.rows} rows)"
+            ]
+        else:
+            lines = [f"index {plan.index} {plan.key.name} (~{plan.rows} rows)"]
+        lines.extend(f"filter {name}" for name in plan.residual)
+        if self._group:
+            lines.append(f"group by {self._group}")
+        return "\n".join(lines)
+    
+    def all(self):
+        """
+        Run the query.
+        
+        Returns:
+            list or dict: Matching orders in index order, or a mapping of
+                group key to its orders when grouped
+        """
+        matches = self._run()
+        if not self._group:
+            return matches
+        groups = {}
+        for order in matches:
+            groups.setdefault(getattr(order, self._group), []).append(order)
+        return groups
+    
+    def __iter__(self):
+        """Iterate over the matching orders."""
+        return iter(self._run())
+    
+    def count(self):
+        """
+        Count the matching orders.
+        
+        Returns:
+            int or dict: Number of orders, or a mapping of group key to count
+        """
+        return self._aggregate(len)
+    
+    def sum(self, field="price"):
+        """
+        Sum a field over the matching orders.
+        
+        Args:
+            field (str): Field to sum (only "price" is supported)
+        
+        Returns:
+            float or dict: Total, or a mapping of group key to total
+        
+        Raises:
+            ValueError: If the field cannot be summed
+        """
+        self._check_numeric(field)
+        return self._aggregate(lambda orders: sum(o.price_cents for o in orders) / 100)
+    
+    def average(self, field="price"):
+        """
+        Average a field over the matching orders.
+        
+        Args:
+            field (str): Field to average (only "price" is supported)
+        
+        Returns:
+            float or dict: Average (0 if no orders), or a mapping of group key to average
+        
+        Raises:
+            ValueError: If the field cannot be averaged
+        """
+        self._check_numeric(field)
+        return self._aggregate(
+            lambda orders: sum(o.price_cents for o in orders) / (100 * len(orders)) if orders else 0
+        )
+    
+    @staticmethod
+    def _check_numeric(field):
+        """
+        Check that a field can be aggregated.
+        
+        Args:
+            field (str): Field name
+        
+        Raises:
+            ValueError: If the field is not numeric
+        """
+        if field != "price":
+            raise ValueError("Only price can be aggregated.")
+    
+    def _aggregate(self, func):
+        """
+        Apply an aggregate to the results or to each group.
+        
+        Args:
+            func (callable): Function from a list of orders to a value
+        
+        Returns:
+            object or dict: The aggregate, or a mapping of group key to aggregate
+        """
+        results = self.all()
+        if self._group:
+            return {key: func(orders) for key, orders in results.items()}
+        return func(results)
+    
+    def _run(self):
+        """
+        Read candidates from the planned index and apply residual filters.
+        
+        Returns:
+            list: Matching orders
+        """
+        plan = self.plan()
+        if plan.index == "scan":
+            candidates = Coffee._all_orders
+        elif plan.index == "price":
+            # Merge the per-coffee price indexes into one price-ordered stream
+            slices = [coffee._price_slice(*plan.key) for coffee in Coffee._ordered_coffees()]
+            candidates = [entry[2] for entry in heapq.merge(*slices)]
+        elif plan.index == "coffee_price":
+            coffee, low, high = plan.key
+            candidates = [entry[2] for entry in coffee._price_slice(low, high)]
+        else:
+            candidates = plan.key._indexed_orders()
+        checks = [self._check(name) for name in plan.residual]
+        return [order for order in candidates if all(check(order) for check in checks)]
+    
+    def _check(self, name):
+        """
+        Build a predicate for one filter.
+        
+        Args:
+            name (str): Filter name
+        
+        Returns:
+            callable: Predicate taking an order
+        """
+        value = self._filters[name]
+        if name == "price_between":
+            low, high = value
+            return lambda order: low <= order.price_cents <= high
+        return lambda order: getattr(order, name) is value
+
+
+# Root query over every order
+orders = Query()
@@ -0,0 +1,211 @@
+
+"""
+Recency, frequency and monetary (RFM) customer segmentation.
+
+compute_rfm() makes one pass over the order ledger to build integer columns,
+then scores every customer at once. NumPy is used when it is installed;
+otherwise the same computation runs on the standard library's arrays.
+
+Orders carry no timestamps, so recency is measured in orders: how many orders
+the shop has taken since the customer's last one.
+"""
+
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+
+from coffee import Coffee
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+RFMScore = namedtuple("RFMScore", "recency frequency monetary r f m")
+RFMResult = namedtuple("RFMResult", "scores segments stats")
+
+SEGMENTS = ("champions", "loyal", "new", "at_risk", "hibernating", "regular")
+
+
+def build_columns(orders=None):
+    """
+    Build integer columns from the order ledger in one pass.
+    
+    Args:
+        orders (iterable, optional): Orders to include (defaults to all orders)
+    
+    Returns:
+        tuple: (customers, customer codes, order ids, prices in cents)
+    """
+    if orders is None:
+        orders = Coffee._all_orders
+    codes_by_customer = {}
+    codes, ids, cents = array("q"), array("q"), array("q")
+    for order in orders:
+        customer = order.customer
+        code = codes_by_customer.get(customer)
+        if code is None:
+            code = codes_by_customer[customer] = len(codes_by_customer)
+        codes.append(code)
+        ids.append(order.id)
+        cents.append(order.price_cents)
+    return list(codes_by_customer), codes, ids, cents
+
+
+def segment(r, f, bins=5):
+    """
+    Assign a segment from recency and frequency scores.
+    
+    A score is high in the top fifth of the scale (4 or 5 of 5) and low in
+    the bottom two fifths (1 or 2 of 5), scaled to the number of bins.
+    
+    Args:
+        r (int): Recency score (higher is more recent)
+        f (int): Frequency score (higher is more frequent)
+        bins (int): Number of score levels the scores were computed with
+    
+    Returns:
+        str: One of SEGMENTS
+    """
+    r_high, f_high = 5 * r >= 4 * bins, 5 * f >= 4 * bins
+    r_low, f_low = 5 * r <= 2 * bins, 5 * f <= 2 * bins
+    if r_high and f_high:
+        return "champions"
+    if f_high:
+        return "loyal"
+    if r_high and f_low:
+        return "new"
+    if r_low and not f_low:
+        return "at_risk"
+    if r_low:
+        return "hibernating"
+    return "regular"
+
+
+def compute_rfm(orders=None, bins=5, use_numpy=None):
+    """
+    Score and segment every customer.
+    
+    Args:
+        orders (iterable, optional): Orders to include (defaults to all orders)
+        bins (int): Number of score levels (scores run from 1 to bins)
+        use_numpy (bool, optional): Force or disable NumPy (default: use it if installed)
+    
+    Returns:
+        RFMResult: scores and segments by Customer, and per-segment stats
+            (customers, orders, revenue, average_monetary)
+    
+    Raises:
+        ValueError: If bins is less than 1
+        ImportError: If use_numpy is True but NumPy is not installed
+    """
+    if bins < 1:
+        raise ValueError("bins must be at least 1.")
+    if use_numpy is None:
+        use_numpy = np is not None
+    elif use_numpy and np is None:
+        raise ImportError("NumPy is not installed.")
+    customers, codes, ids, cents = build_columns(orders)
+    if not customers:
+        return RFMResult({}, {}, {})
+    if use_numpy:
+        columns = _columns_numpy(len(customers), codes, ids, cents)
+        columns += tuple(_scores_numpy(column, bins) for column in columns)
+        columns = [column.tolist() for column in columns]
+    else:
+        columns = _columns_python(len(customers), codes, ids, cents)
+        columns += tuple(_scores(column, bins) for column in columns)
+    last, frequency, monetary, r_scores, f_scores, m_scores = columns
+    latest = max(last)
+    
+    scores, segments, stats = {}, {}, {}
+    for i, customer in enumerate(customers):
+        score = RFMScore(
+            latest - last[i], frequency[i], monetary[i] / 100,
+            r_scores[i], f_scores[i], m_scores[i],
+        )
+        scores[customer] = score
+        name = segments[customer] = segment(score.r, score.f, bins)
+        totals = stats.setdefault(name, {"customers": 0, "orders": 0, "revenue": 0})
+        totals["customers"] += 1
+        totals["orders"] += frequency[i]
+        totals["revenue"] += monetary[i]
+    for totals in stats.values():
+        totals["average_monetary"] = totals["revenue"] / (100 * totals["customers"])
+        totals["revenue"] /= 100
+    return RFMResult(scores, segments, stats)
+
+
+def _columns_numpy(n, codes, ids, cents):
+    """
+    Aggregate per-customer columns with NumPy.
+    
+    Args:
+        n (int): Number of customers
+        codes (array): Customer code per order
+        ids (array): Order id per order
+        cents (array): Price in cents per order
+    
+    Returns:
+        tuple: Arrays of last order id, order count and cents spent per customer
+    """
+    codes = np.frombuffer(codes, dtype=np.int64)
+    last = np.zeros(n, dtype=np.int64)
+    np.maximum.at(last, codes, np.frombuffer(ids, dtype=np.int64))
+    frequency = np.bincount(codes, minlength=n)
+    monetary = np.zeros(n, dtype=np.int64)
+    np.add.at(monetary, codes, np.frombuffer(cents, dtype=np.int64))
+    return last, frequency, monetary
+
+
+def _columns_python(n, codes, ids, cents):
+    """
+    Aggregate per-customer columns with plain Python.
+    
+    Args:
+        n (int): Number of customers
+        codes (array): Customer code per order
+        ids (array): Order id per order
+        cents (array): Price in cents per order
+    
+    Returns:
+        tuple: Lists of last order id, order count and cents spent per customer
+    """
+    last, frequency, monetary = [0] * n, [0] * n, [0] * n
+    for code, order_id, price in zip(codes, ids, cents):
+        if order_id > last[code]:
+            last[code] = order_id
+        frequency[code] += 1
+        monetary[code] += price
+    return last, frequency, monetary
+
+
+def _scores(values, bins):
+    """
+    Score values from 1 to bins by rank; equal values get equal scores.
+    
+    Args:
+        values (list): One value per customer
+        bins (int): Number of score levels
+    
+    Returns:
+        list: Score per customer
+    """
+    n = len(values)
+    ordered = sorted(values)
+    return [bisect_left(ordered, value) * bins // n + 1 for value in values]
+
+
+def _scores_numpy(values, bins):
+    """
+    Score values from 1 to bins by rank with NumPy; equal values get equal scores.
+    
+    Args:
+        values (numpy.ndarray): One value per customer
+        bins (int): Number of score levels
+        
+    Returns:
+        numpy.ndarray: Score per customer
+    """
+    ranks = np.searchsorted(np.sort(values), values, side="left")
+    return ranks * bins // len(values) + 1
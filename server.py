@@ -0,0 +1,319 @@
+
+"""
+Lightweight asyncio HTTP/JSON service for the Coffee Shop domain model.
+Built only on the standard library; run it with:
+
+python server.py --port 8080
+"""
+
+import argparse
+import asyncio
+import json
+from urllib.parse import unquote
+
+from customer import Customer
+from coffee import Coffee
+
+REASONS = {
+    200: "OK",
+    201: "Created",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+MAX_BODY_SIZE = 64 * 1024
+
+
+class HTTPError(Exception):
+    """Raised by request handlers to send an error response."""
+    
+    def __init__(self, status, message):
+        """
+        Initialize an HTTPError.
+        
+        Args:
+            status (int): HTTP status code
+            message (str): Error message returned in the JSON body
+        """
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ShopServer:
+    """Serves the domain model over HTTP/1.1 with keep-alive connections."""
+    
+    def __init__(self, host="127.0.0.1", port=8080, batch_size=64):
+        """
+        Initialize a ShopServer.
+        
+        Args:
+            host (str): Interface to listen on
+            port (int): Port to listen on (0 picks a free port)
+            batch_size (int): Maximum number of queued orders the writer applies,
+                one at a time, before yielding to the event loop
+        """
+        self.host = host
+        self.port = port
+        self.batch_size = batch_size
+        self.customers = {}
+        self.coffees = {}
+        self._server = None
+        self._writes = None
+        self._writer_task = None
+    
+    async def start(self):
+        """Start listening and launch the order writer."""
+        self._writes = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._write_orders())
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+    
+    async def serve_forever(self):
+        """Start the server if needed and serve until cancelled."""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+    
+    async def close(self):
+        """Stop listening and stop the order writer."""
+        self._server.close()
+        await self._server.wait_closed()
+        self._writer_task.cancel()
+        try:
+            await self._writer_task
+        except asyncio.CancelledError:
+            pass
+    
+    async def _handle_connection(self, reader, writer):
+        """
+        Serve requests on one connection until the client closes it.
+        
+        Args:
+            reader (asyncio.StreamReader): Connection reader
+            writer (asyncio.StreamWriter): Connection writer
+        """
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                try:
+                    method, path, headers = self._parse_head(head)
+                    length = int(headers.get("content-length", 0))
+                    if length < 0:
+                        raise ValueError("Content-Length must not be negative.")
+                except ValueError:
+                    self._send(writer, 400, {"error": "Malformed request."}, False)
+                    await writer.drain()
+                    break
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    if length > MAX_BODY_SIZE:
+                        keep_alive = False
+                        raise HTTPError(413, "Request body too large.")
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self._dispatch(method, path, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": e.message}
+                self._send(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+    
+    @staticmethod
+    def _parse_head(head):
+        """
+        Parse the request line and headers.
+        
+        Args:
+            head (bytes): Raw request head including the blank line
+        
+        Returns:
+            tuple: (method, path, headers) with lower-cased header names
+        """
+        lines = head.decode("latin-1").split("\r\n")
+        method, path, _ = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+        return method, path, headers
+    
+    @staticmethod
+    def _send(writer, status, payload, keep_alive):
+        """
+        Write a JSON response.
+        
+        Args:
+            writer (asyncio.StreamWriter): Connection writer
+            status (int): HTTP status code
+            payload (object): JSON-serializable response body
+            keep_alive (bool): Whether the connection stays open
+        """
+        body = json.dumps(payload).encode()
+        head = (
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode() + body)
+    
+    async def _dispatch(self, method, path, body):
+        """
+        Route a request to its handler.
+        
+        Args:
+            method (str): HTTP method
+            path (str): Request path
+            body (bytes): Request body
+        
+        Returns:
+            tuple: (status, payload)
+        
+        Raises:
+            HTTPError: If the route is unknown or the request is invalid
+        """
+        parts = [unquote(part) for part in path.split("?", 1)[0].strip("/").split("/")]
+        if parts == ["orders"]:
+            if method != "POST":
+                raise HTTPError(405, "Use POST to create orders.")
+            return 201, await self._create_order(body)
+        if len(parts) == 3 and parts[0] == "coffees":
+            if method != "GET":
+                raise HTTPError(405, "Use GET to query coffees.")
+            return 200, self._query_coffee(parts[1], parts[2])
+        raise HTTPError(404, "Unknown route.")
+    
+    async def _create_order(self, body):
+        """
+        Queue an order for the order writer and wait for it to be applied.
+        
+        Args:
+            body (bytes): JSON body with customer, coffee, price and an
+                optional idempotency_key
+        
+        Returns:
+            dict: The created order
+        
+        Raises:
+            HTTPError: If the body is not valid JSON or the order is invalid
+        """
+        try:
+            data = json.loads(body)
+            request = (data["customer"], data["coffee"], data["price"], data.get("idempotency_key"))
+        except (ValueError, TypeError, KeyError):
+            raise HTTPError(400, "Body must be JSON with customer, coffee and price.")
+        done = asyncio.get_running_loop().create_future()
+        self._writes.put_nowait((request, done))
+        return await done
+    
+    async def _write_orders(self):
+        """
+        Apply queued orders one at a time from a single writer task.
+        
+        Each wakeup drains up to batch_size queued orders before yielding to
+        the event loop again. Orders are still created one by one: holding the
+        shard lock across several orders would invert the lock order of a
+        concurrent create_order waiting on the same idempotency key.
+        """
+        while True:
+            batch = [await self._writes.get()]
+            while len(batch) < self.batch_size and not self._writes.empty():
+                batch.append(self._writes.get_nowait())
+            for request, done in batch:
+                if done.done():
+                    # The client went away before its order was applied
+                    continue
+                try:
+                    result = self._apply_order(*request)
+                except (TypeError, ValueError) as e:
+                    done.set_exception(HTTPError(400, str(e)))
+                except Exception as e:
+                    # Keep the single writer alive for every later request
+                    done.set_exception(HTTPError(500, f"Could not create order: {e}"))
+                else:
+                    done.set_result(result)
+    
+    def _apply_order(self, customer_name, coffee_name, price, idempotency_key=None):
+        """
+        Create an order, creating its customer and coffee on first use.
+        
+        Args:
+            customer_name (str): Customer's name
+            coffee_name (str): Coffee's name
+            price (float): The price of the order
+            idempotency_key (str, optional): Key identifying a retried sale
+        
+        Returns:
+            dict: The created order
+        
+        Raises:
+            TypeError: If a name or the price has the wrong type
+            ValueError: If a name or the price is invalid
+        """
+        customer = self.customers.get(customer_name)
+        if customer is None:
+            customer = Customer(customer_name)
+        coffee = self.coffees.get(coffee_name)
+        if coffee is None:
+            coffee = Coffee(coffee_name)
+        order = customer.create_order(coffee, price, idempotency_key=idempotency_key)
+        self.customers[customer_name] = customer
+        self.coffees[coffee_name] = coffee
+        return {"customer": customer.name, "coffee": coffee.name, "price": order.price}
+    
+    def _query_coffee(self, name, query):
+        """
+        Answer a query about a coffee.
+        
+        Args:
+            name (str): Coffee's name
+            query (str): One of average_price, customers or most_aficionado
+        
+        Returns:
+            dict: The query result
+        
+        Raises:
+            HTTPError: If the coffee or query is unknown
+        """
+        coffee = self.coffees.get(name)
+        if coffee is None:
+            raise HTTPError(404, "Unknown coffee.")
+        if query == "average_price":
+            return {"coffee": name, "average_price": coffee.average_price()}
+        if query == "customers":
+            return {"coffee": name, "customers": sorted(c.name for c in coffee.customers())}
+        if query == "most_aficionado":
+            customer = Customer.most_aficionado(coffee)
+            return {"coffee": name, "customer": customer.name if customer else None}
+        raise HTTPError(404, "Unknown query.")
+
+
+def main():
+    """Run the server from the command line."""
+    parser = argparse.ArgumentParser(description="Serve the coffee shop over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+    server = ShopServer(args.host, args.port, args.batch_size)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+
+"""
+Single entry point for the Coffee Shop domain model.
+
+Names are imported from their modules on first access (PEP 562), so
+`import shop` is nearly free and a process only loads the modules it uses.
+A cold start that places an order loads the same modules as importing order
+directly, just later, so it is no faster end to end (see
+benchmarks/bench_import.py); the saving is for processes that never order:
+
+import shop
+
+alice = shop.Customer("Alice")
+alice.create_order(shop.Coffee("Espresso"), 3.0)
+"""
+
+import importlib
+
+# Public name to the module that defines it
+_EXPORTS = {
+    "Customer": "customer",
+    "Coffee": "coffee",
+    "Order": "order",
+    "Store": "store",
+    "StoreRegistry": "store",
+    "orders": "query",
+    "Query": "query",
+    "bus": "events",
+    "snapshot": "snapshot",
+    "IdempotencyCache": "idempotency",
+    "compute_rfm": "rfm",
+    "OrderArchive": "archive",
+    "write_archive": "archive",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    """
+    Import a public name on first access and cache it in this module.
+    
+    Args:
+        name (str): Attribute name
+    
+    Returns:
+        object: The exported object
+    
+    Raises:
+        AttributeError: If name is not exported
+    """
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """List the module's names, including those not yet imported."""
+    return sorted(set(globals()) | set(_EXPORTS))
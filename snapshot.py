@@ -0,0 +1,266 @@
+
+"""
+Point-in-time snapshots of the order ledger.
+
+A snapshot records the id of the last order that existed when it was taken.
+Orders are only ever appended, so later orders are simply ignored; when an
+existing order is changed, Order saves its previous values into each live
+snapshot first (copy-on-write). Each query reads only the live per-customer or
+per-coffee index it needs and substitutes the saved values of changed orders,
+so readers get repeatable results without blocking writers or copying the
+ledger. Writers pay for tracking until the snapshot is released:
+
+with snapshot() as snap:
+    snap.average_price(espresso)
+"""
+
+import weakref
+from collections import namedtuple
+from itertools import islice
+from operator import attrgetter
+
+from coffee import Coffee
+from store import live_shards
+
+OrderView = namedtuple("OrderView", "id customer coffee price_cents")
+OrderView.price = property(lambda self: self.price_cents / 100, doc="Price as a float.")
+
+# Snapshots that still need before-images of changed orders
+_live = weakref.WeakSet()
+
+
+def snapshot():
+    """
+    Take a snapshot of all orders.
+    
+    Returns:
+        Snapshot: The new snapshot
+    """
+    return Snapshot()
+
+
+def preserve(order):
+    """
+    Save an order's current values into every live snapshot before it changes.
+    
+    Args:
+        order (Order): The order about to change
+    """
+    if not _live:
+        return
+    image = (order.customer, order.coffee, order.price_cents)
+    for snap in list(_live):
+        if order.id <= snap._last_id:
+            snap._before.setdefault(order, image)
+
+
+class Snapshot:
+    """A repeatable, read-only view of the orders at one point in time."""
+    
+    def __init__(self):
+        """Freeze the current ledger length and start tracking changes."""
+        # Orders take their id while appending under the ledger lock, so every
+        # order up to the last id is in the frozen part of the ledger
+        with Coffee._ledger_lock:
+            self._ledger = Coffee._all_orders
+            self._size = len(self._ledger)
+            self._last_id = self._ledger[self._size - 1].id if self._size else 0
+        # Order -> (customer, coffee, price_cents) before its first change
+        self._before = {}
+        _live.add(self)
+        # An order holds its shard's lock from before its append until it is
+        # indexed; taking each lock once waits for those still being indexed
+        for shard in live_shards():
+            with shard._lock:
+                pass
+    
+    def __enter__(self):
+        """Use the snapshot as a context manager."""
+        return self
+    
+    def __exit__(self, *exc_info):
+        """Release the snapshot on exit."""
+        self.release()
+    
+    def release(self):
+        """
+        Stop tracking changes.
+        
+        Queries after release see changes made to orders since then.
+        """
+        _live.discard(self)
+    
+    def orders(self):
+        """
+        Get all orders as they were when the snapshot was taken.
+        
+        Returns:
+            list: List of OrderView instances
+        """
+        return [self._view(order) for order in islice(self._ledger, self._size)]
+    
+    def customer_orders(self, customer):
+        """
+        Get the orders placed by a customer.
+        
+        Args:
+            customer (Customer): The customer to check
+        
+        Returns:
+            list: List of OrderView instances for this customer
+        """
+        return self._select(customer._indexed_orders(), 1, customer)
+    
+    def coffees(self, customer):
+        """
+        Get unique coffees ordered by a customer.
+        
+        Args:
+            customer (Customer): The customer to check
+        
+        Returns:
+            list: Unique list of Coffee instances ordered by this customer
+        """
+        return list({view.coffee: None for view in self.customer_orders(customer)})
+    
+    def coffee_orders(self, coffee):
+        """
+        Get the orders for a coffee.
+        
+        Args:
+            coffee (Coffee): The coffee to check
+        
+        Returns:
+            list: List of OrderView instances for this coffee
+        """
+        return self._select(coffee._indexed_orders(), 2, coffee)
+    
+    def customers(self, coffee):
+        """
+        Get unique customers who ordered a coffee.
+        
+        Args:
+            coffee (Coffee): The coffee to check
+        
+        Returns:
+            list: Unique list of Customer instances who ordered this coffee
+        """
+        return list({view.customer: None for view in self.coffee_orders(coffee)})
+    
+    def num_orders(self, coffee):
+        """
+        Get the number of orders for a coffee.
+        
+        Args:
+            coffee (Coffee): The coffee to check
+        
+        Returns:
+            int: Total number of orders for this coffee
+        """
+        return self.coffee_totals(coffee)[1]
+    
+    def average_price(self, coffee):
+        """
+        Get the average price of a coffee's orders.
+        
+        Args:
+            coffee (Coffee): The coffee to check
+        
+        Returns:
+            float: Average price of orders for this coffee, or 0 if no orders
+        """
+        total, count = self.coffee_totals(coffee)
+        return total / (100 * count) if count else 0
+    
+    def most_aficionado(self, coffee):
+        """
+        Find the customer who had spent the most money on a coffee.
+        
+        Args:
+            coffee (Coffee): The coffee to check
+        
+        Returns:
+            Customer: The customer with highest spending on this coffee, or None
+        """
+        spending = self.coffee_spending(coffee)
+        if not spending:
+            return None
+        return max(spending, key=spending.get)
+    
+    def coffee_totals(self, coffee):
+        """
+        Get the price aggregate for a coffee, like Store.coffee_totals.
+        
+        Args:
+            coffee (Coffee): The coffee to check
+        
+        Returns:
+            tuple: (total spent in cents, number of orders)
+        """
+        views = self.coffee_orders(coffee)
+        return sum(view.price_cents for view in views), len(views)
+    
+    def coffee_spending(self, coffee):
+        """
+        Get the per-customer spending on a coffee, like Store.coffee_spending.
+        
+        Args:
+            coffee (Coffee): The coffee to check
+        
+        Returns:
+            dict: Mapping of Customer to total cents spent
+        """
+        spending = {}
+        for view in self.coffee_orders(coffee):
+            spending[view.customer] = spending.get(view.customer, 0) + view.price_cents
+        return spending
+    
+    def _view(self, order):
+        """
+        Get an order's values as of the snapshot.
+        
+        The live values are read before checking for a saved before-image:
+        preserve() always runs before a change, so a missing image means the
+        values read were not yet changed.
+        
+        Args:
+            order (Order): An order from the frozen part of the ledger
+        
+        Returns:
+            OrderView: The order's values when the snapshot was taken
+        """
+        live = (order.customer, order.coffee, order.price_cents)
+        image = self._before.get(order)
+        return OrderView(order.id, *(image or live))
+    
+    def _select(self, indexed, field, key):
+        """
+        Get the orders whose customer or coffee was key when the snapshot was taken.
+        
+        Orders still indexed under key are read from the live indexes; orders
+        moved away from key since the snapshot are found by their before-images.
+        The indexes are copied before the before-images are read, and preserve()
+        saves an image before an order leaves an index, so no order is missed.
+        
+        Args:
+            indexed (list): Orders copied from the live indexes of key (a customer or coffee)
+            field (int): Position of the field in OrderView (1 customer, 2 coffee)
+            key (Customer or Coffee): The value to match
+        
+        Returns:
+            list: Matching OrderView instances, in order of creation
+        """
+        last_id = self._last_id
+        views, seen = [], set()
+        for order in indexed:
+            if order.id > last_id:
+                continue
+            seen.add(order)
+            view = self._view(order)
+            if view[field] is key:
+                views.append(view)
+        for order, image in list(self._before.items()):
+            if order not in seen and image[field - 1] is key:
+                views.append(OrderView(order.id, *image))
+        views.sort(key=attrgetter("id"))
+        return views
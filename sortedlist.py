@@ -0,0 +1,187 @@
+"""
+Sorted list stored as bounded chunks.
+
+Inserting into one flat sorted list moves every later element, so each write
+costs O(n). SortedList keeps its elements in chunks of at most 2 * chunk_size
+plus the largest element of each chunk: a write bisects the chunk maxima and
+then shifts at most one chunk, and a full chunk is split in two. Rank lookups
+use per-chunk start offsets that are rebuilt lazily after writes.
+
+SortedList is not thread-safe; callers serialize access.
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from itertools import accumulate, chain, islice
+
+# Default chunk length; chunks are split when they reach twice this size
+CHUNK_SIZE = 512
+
+
+class SortedList:
+    """A sorted list with cheap inserts and removals."""
+    
+    def __init__(self, chunk_size=CHUNK_SIZE):
+        """
+        Initialize an empty SortedList.
+        
+        Args:
+            chunk_size (int): Target chunk length
+        """
+        self._chunk_size = chunk_size
+        self._chunks = []
+        # Largest element of each chunk, for locating the chunk of a value
+        self._maxes = []
+        # Rank of the first element of each chunk, or None until next needed
+        self._offsets = None
+        self._len = 0
+    
+    def __len__(self):
+        """Get the number of elements."""
+        return self._len
+    
+    def __iter__(self):
+        """Iterate over the elements in sorted order."""
+        return chain.from_iterable(self._chunks)
+    
+    def __getitem__(self, index):
+        """
+        Get the element at a rank, or a list of elements for a slice.
+        
+        Args:
+            index (int or slice): Rank, or a slice with step 1
+        
+        Returns:
+            object or list: The element, or the elements in the slice
+        
+        Raises:
+            IndexError: If the rank is out of range
+            ValueError: If the slice has a step other than 1
+        """
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._len)
+            if step != 1:
+                raise ValueError("Slice step must be 1.")
+            return self._slice(start, stop)
+        if index < 0:
+            index += self._len
+        if index < 0 or index >= self._len:
+            raise IndexError("SortedList index out of range.")
+        offsets = self._chunk_offsets()
+        chunk = bisect_right(offsets, index) - 1
+        return self._chunks[chunk][index - offsets[chunk]]
+    
+    def add(self, value):
+        """
+        Insert a value, keeping the list sorted.
+        
+        Args:
+            value (object): The value to insert
+        """
+        chunks, maxes = self._chunks, self._maxes
+        self._len += 1
+        self._offsets = None
+        if not maxes:
+            chunks.append([value])
+            maxes.append(value)
+            return
+        position = bisect_left(maxes, value)
+        if position == len(maxes):
+            position -= 1
+            chunk = chunks[position]
+            chunk.append(value)
+            maxes[position] = value
+        else:
+            chunk = chunks[position]
+            insort(chunk, value)
+        if len(chunk) >= 2 * self._chunk_size:
+            chunks.insert(position + 1, chunk[self._chunk_size:])
+            del chunk[self._chunk_size:]
+            maxes.insert(position, chunk[-1])
+    
+    def remove(self, value):
+        """
+        Remove one occurrence of a value.
+        
+        Args:
+            value (object): The value to remove
+        
+        Raises:
+            ValueError: If the value is not in the list
+        """
+        chunks, maxes = self._chunks, self._maxes
+        position = bisect_left(maxes, value)
+        if position < len(maxes):
+            chunk = chunks[position]
+            index = bisect_left(chunk, value)
+            if chunk[index] == value:
+                del chunk[index]
+                self._len -= 1
+                self._offsets = None
+                if not chunk:
+                    del chunks[position]
+                    del maxes[position]
+                elif index == len(chunk):
+                    maxes[position] = chunk[-1]
+                return
+        raise ValueError("Value is not in the SortedList.")
+    
+    def bisect_left(self, value):
+        """
+        Get the rank of the first element not less than a value.
+        
+        Args:
+            value (object): The value to locate
+        
+        Returns:
+            int: Insertion rank before any equal elements
+        """
+        position = bisect_left(self._maxes, value)
+        if position == len(self._maxes):
+            return self._len
+        return self._chunk_offsets()[position] + bisect_left(self._chunks[position], value)
+    
+    def bisect_right(self, value):
+        """
+        Get the rank of the first element greater than a value.
+        
+        Args:
+            value (object): The value to locate
+        
+        Returns:
+            int: Insertion rank after any equal elements
+        """
+        position = bisect_right(self._maxes, value)
+        if position == len(self._maxes):
+            return self._len
+        return self._chunk_offsets()[position] + bisect_right(self._chunks[position], value)
+    
+    def _chunk_offsets(self):
+        """
+        Get the rank of the first element of each chunk.
+        
+        Returns:
+            list: Start rank per chunk
+        """
+        if self._offsets is None:
+            self._offsets = [0, *accumulate(map(len, self._chunks))][:-1]
+        return self._offsets
+    
+    def _slice(self, start, stop):
+        """
+        Get the elements between two ranks.
+        
+        Args:
+            start (int): First rank, inclusive
+            stop (int): Last rank, exclusive
+        
+        Returns:
+            list: The elements in sorted order
+        """
+        if start >= stop:
+            return []
+        offsets = self._chunk_offsets()
+        chunk = bisect_right(offsets, start) - 1
+        first = offsets[chunk]
+        return list(islice(
+            chain.from_iterable(self._chunks[chunk:]), start - first, stop - first
+        ))
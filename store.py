@@ -0,0 +1,336 @@
+
+import math
+import threading
+import weakref
+
+from sortedlist import SortedList
+
+# Every shard in use, so readers can wait for writes already in progress
+_shards = weakref.WeakSet()
+_shards_lock = threading.Lock()
+
+
+def live_shards():
+    """
+    Get every shard that still exists.
+    
+    Returns:
+        list: Shard instances, including stores
+    """
+    with _shards_lock:
+        return list(_shards)
+
+
+class Shard:
+    """
+    Holds the order indexes and partial aggregates for one group of orders.
+    
+    Every order lives in exactly one shard: its store, or a shared shard for
+    orders placed without a store. Writers hold only that shard's lock, so
+    orders at different stores never contend; Customer and Coffee merge their
+    orders from every shard they appear in when read.
+    """
+    
+    def __init__(self):
+        """Initialize an empty shard."""
+        # Held by Order for the whole of each update to this shard
+        self._lock = threading.Lock()
+        self._orders = {}
+        # Customer or coffee -> its orders in this shard, as an insertion-ordered set
+        self._entity_orders = {}
+        # Coffee -> its orders sorted by price, as (price_cents, id, order) entries
+        self._price_index = {}
+        # Customer -> {coffee: number of orders}, to track first orders of a coffee
+        self._coffee_counts = {}
+        # Partial aggregates: coffee -> [total cents spent, order count]
+        self._coffee_totals = {}
+        # Partial aggregates: coffee -> {customer: [total cents spent, order count]}
+        self._coffee_spending = {}
+        with _shards_lock:
+            _shards.add(self)
+    
+    def orders(self):
+        """
+        Get all orders in this shard.
+        
+        Returns:
+            list: List of Order instances
+        """
+        with self._lock:
+            return list(self._orders)
+    
+    def coffee_totals(self, coffee):
+        """
+        Get the partial price aggregate for a coffee in this shard.
+        
+        Args:
+            coffee (Coffee): The coffee to check
+        
+        Returns:
+            tuple: (total spent in cents, number of orders)
+        """
+        with self._lock:
+            totals = self._coffee_totals.get(coffee)
+            return (totals[0], totals[1]) if totals else (0, 0)
+    
+    def coffee_spending(self, coffee):
+        """
+        Get the per-customer spending on a coffee in this shard.
+        
+        Args:
+            coffee (Coffee): The coffee to check
+        
+        Returns:
+            dict: Mapping of Customer to total cents spent, in first-order order
+        """
+        with self._lock:
+            spending = self._coffee_spending.get(coffee, {})
+            return {customer: totals[0] for customer, totals in spending.items()}
+    
+    def _orders_of(self, entity):
+        """
+        Get the orders of a customer or coffee in this shard.
+        
+        Args:
+            entity (Customer or Coffee): The customer or coffee
+        
+        Returns:
+            list: Order instances, in the order they were indexed
+        """
+        with self._lock:
+            return list(self._entity_orders.get(entity, ()))
+    
+    def _count_of(self, entity):
+        """
+        Count the orders of a customer or coffee in this shard.
+        
+        Args:
+            entity (Customer or Coffee): The customer or coffee
+        
+        Returns:
+            int: Number of orders
+        """
+        with self._lock:
+            return len(self._entity_orders.get(entity, ()))
+    
+    def _price_count(self, coffee, low, high):
+        """
+        Count a coffee's orders in this shard within a cents range.
+        
+        Args:
+            coffee (Coffee): The coffee to check
+            low (int): Lowest price in cents
+            high (int): Highest price in cents
+        
+        Returns:
+            int: Number of orders priced between low and high
+        """
+        with self._lock:
+            index = self._price_index.get(coffee)
+            if index is None:
+                return 0
+            return max(0, index.bisect_right((high, math.inf)) - index.bisect_left((low,)))
+    
+    def _price_slice(self, coffee, low, high):
+        """
+        Get a coffee's price index entries in this shard within a cents range.
+        
+        Args:
+            coffee (Coffee): The coffee to check
+            low (int): Lowest price in cents
+            high (int): Highest price in cents
+        
+        Returns:
+            list: (price_cents, id, order) entries, cheapest first
+        """
+        with self._lock:
+            index = self._price_index.get(coffee)
+            if index is None:
+                return []
+            return index[index.bisect_left((low,)):index.bisect_right((high, math.inf))]
+    
+    def _price_bounds(self, coffee):
+        """
+        Get the lowest and highest price of a coffee's orders in this shard.
+        
+        Args:
+            coffee (Coffee): The coffee to check
+        
+        Returns:
+            tuple: (lowest, highest) price in cents, or None if no orders
+        """
+        with self._lock:
+            index = self._price_index.get(coffee)
+            return (index[0][0], index[-1][0]) if index else None
+    
+    def _add(self, order):
+        """
+        Add an order to this shard's indexes and partial aggregates.
+        
+        The caller holds the shard's lock.
+        
+        Args:
+            order (Order): The order being registered
+        """
+        coffee, customer, price = order.coffee, order.customer, order.price_cents
+        self._orders[order] = None
+        for entity in (customer, coffee):
+            orders = self._entity_orders.get(entity)
+            if orders is None:
+                orders = self._entity_orders[entity] = {}
+                entity._shards[self] = None
+            orders[order] = None
+        index = self._price_index.get(coffee)
+        if index is None:
+            index = self._price_index[coffee] = SortedList()
+        index.add((price, order.id, order))
+        coffee._mark_ordered()
+        counts = self._coffee_counts.setdefault(customer, {})
+        count = counts.get(coffee, 0)
+        if not count:
+            customer._add_coffee(coffee)
+        counts[coffee] = count + 1
+        totals = self._coffee_totals.setdefault(coffee, [0, 0])
+        totals[0] += price
+        totals[1] += 1
+        spent = self._coffee_spending.setdefault(coffee, {}).setdefault(customer, [0, 0])
+        spent[0] += price
+        spent[1] += 1
+    
+    def _remove(self, order):
+        """
+        Remove an order from this shard's indexes and partial aggregates.
+        
+        The caller holds the shard's lock.
+        
+        Args:
+            order (Order): The order being unregistered
+        """
+        coffee, customer, price = order.coffee, order.customer, order.price_cents
+        del self._orders[order]
+        for entity in (customer, coffee):
+            orders = self._entity_orders[entity]
+            del orders[order]
+            if not orders:
+                del self._entity_orders[entity]
+        index = self._price_index[coffee]
+        index.remove((price, order.id, order))
+        if not index:
+            del self._price_index[coffee]
+        counts = self._coffee_counts[customer]
+        count = counts[coffee] - 1
+        if count:
+            counts[coffee] = count
+        else:
+            del counts[coffee]
+            if not counts:
+                del self._coffee_counts[customer]
+            customer._remove_coffee(coffee)
+        totals = self._coffee_totals[coffee]
+        totals[0] -= price
+        totals[1] -= 1
+        if not totals[1]:
+            del self._coffee_totals[coffee]
+        spending = self._coffee_spending[coffee]
+        spent = spending[customer]
+        spent[0] -= price
+        spent[1] -= 1
+        if not spent[1]:
+            del spending[customer]
+            if not spending:
+                del self._coffee_spending[coffee]
+
+
+class Store(Shard):
+    """Represents a single shop location holding its own shard of orders."""
+    
+    def __init__(self, name):
+        """
+        Initialize a Store with a name.
+        
+        Args:
+            name (str): Store's name (must be a non-empty string)
+        
+        Raises:
+            TypeError: If name is not a string
+            ValueError: If name is empty
+        """
+        if not isinstance(name, str):
+            raise TypeError("Name must be a string.")
+        if not name:
+            raise ValueError("Name must not be empty.")
+        super().__init__()
+        self._name = name
+    
+    @property
+    def name(self):
+        """Get the store's name."""
+        return self._name
+
+
+class StoreRegistry:
+    """Holds every store and merges their partial aggregates."""
+    
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._lock = threading.Lock()
+        self._stores = {}
+    
+    def store(self, name):
+        """
+        Get the store with the given name, creating it if needed.
+        
+        Args:
+            name (str): The store's name
+        
+        Returns:
+            Store: The store registered under that name
+        """
+        with self._lock:
+            store = self._stores.get(name)
+            if store is None:
+                store = self._stores[name] = Store(name)
+            return store
+    
+    def stores(self):
+        """
+        Get all registered stores.
+        
+        Returns:
+            list: List of Store instances in creation order
+        """
+        with self._lock:
+            return list(self._stores.values())
+    
+    def coffee_totals(self, coffee):
+        """
+        Merge the partial price aggregates for a coffee across all stores.
+        
+        Args:
+            coffee (Coffee): The coffee to check
+        
+        Returns:
+            tuple: (total spent in cents, number of orders)
+        """
+        total, count = 0, 0
+        for store in self.stores():
+            store_total, store_count = store.coffee_totals(coffee)
+            total += store_total
+            count += store_count
+        return total, count
+    
+    def coffee_spending(self, coffee):
+        """
+        Merge the per-customer spending on a coffee across all stores.
+        
+        Args:
+            coffee (Coffee): The coffee to check
+        
+        Returns:
+            dict: Mapping of Customer to total cents spent
+        """
+        merged = {}
+        for store in self.stores():
+            for customer, spent in store.coffee_spending(coffee).items():
+                merged[customer] = merged.get(customer, 0) + spent
+        return merged
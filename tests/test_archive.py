@@ -0,0 +1,109 @@
+
+"""Tests for memory-mapped order archives."""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path to import our classes
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from customer import Customer
+from coffee import Coffee
+from archive import OrderArchive, write_archive
+
+
+class TestOrderArchive:
+    """Tests for writing and querying archives."""
+    
+    def setup_method(self):
+        """Reset order tracking and build a small shop before each test."""
+        Customer._all_orders = []
+        Coffee._all_orders = []
+        self.alice = Customer("Alice")
+        self.bob = Customer("Bob")
+        self.latte = Coffee("Latte")
+        self.mocha = Coffee("Mocha")
+        self.bob.create_order(self.latte, 3.0)
+        self.alice.create_order(self.latte, 2.0)
+        self.alice.create_order(self.mocha, 4.5)
+        self.alice.create_order(self.latte, 1.0)  # Tie with Bob at 3.0
+    
+    def open_archive(self, tmp_path, use_numpy=False):
+        """Archive all orders and open the file."""
+        path = str(tmp_path / "orders.arc")
+        customer_ids, coffee_ids = write_archive(path)
+        return OrderArchive(path, use_numpy=use_numpy), customer_ids, coffee_ids
+    
+    def test_write_ids(self, tmp_path):
+        """Test that entities are numbered in order of first appearance."""
+        archive, customer_ids, coffee_ids = self.open_archive(tmp_path)
+        with archive:
+            assert customer_ids == {self.bob: 0, self.alice: 1}
+            assert coffee_ids == {self.latte: 0, self.mocha: 1}
+            assert len(archive) == 4
+    
+    def test_queries_match_model(self, tmp_path):
+        """Test that archive queries agree with the live model."""
+        archive, customer_ids, coffee_ids = self.open_archive(tmp_path)
+        with archive:
+            for coffee, coffee_id in coffee_ids.items():
+                assert archive.num_orders(coffee_id) == coffee.num_orders()
+                assert archive.average_price(coffee_id) == coffee.average_price()
+                assert sorted(archive.customers(coffee_id)) == sorted(
+                    customer_ids[customer] for customer in coffee.customers()
+                )
+                fan = Customer.most_aficionado(coffee)
+                assert archive.most_aficionado(coffee_id) == customer_ids[fan]
+            assert archive.customers(0) == [0, 1]
+    
+    def test_unknown_coffee(self, tmp_path):
+        """Test queries for a coffee id with no archived orders."""
+        archive, _, _ = self.open_archive(tmp_path)
+        with archive:
+            assert archive.num_orders(7) == 0
+            assert archive.average_price(7) == 0
+            assert archive.customers(7) == []
+            assert archive.most_aficionado(7) is None
+    
+    def test_numpy_matches_python(self, tmp_path):
+        """Test that the NumPy path gives the same answers."""
+        pytest.importorskip("numpy")
+        archive, _, _ = self.open_archive(tmp_path)
+        fast = OrderArchive(archive.path, use_numpy=True)
+        with archive, fast:
+            for coffee_id in (0, 1, 7):
+                assert fast.num_orders(coffee_id) == archive.num_orders(coffee_id)
+                assert fast.average_price(coffee_id) == archive.average_price(coffee_id)
+                assert fast.customers(coffee_id) == archive.customers(coffee_id)
+                assert fast.most_aficionado(coffee_id) == archive.most_aficionado(coffee_id)
+    
+    def test_names_are_archived(self, tmp_path):
+        """Test that ids can be mapped back to names from the file alone."""
+        archive, _, _ = self.open_archive(tmp_path)
+        with archive:
+            assert archive.customer_names == ["Bob", "Alice"]
+            assert archive.coffee_names == ["Latte", "Mocha"]
+            assert archive.coffee_id("Mocha") == 1
+            assert archive.coffee_id("Espresso") is None
+            fan = archive.most_aficionado(archive.coffee_id("Latte"))
+            assert archive.customer_names[fan] == "Bob"
+    
+    @pytest.mark.parametrize("content", [b"", b"abcd", b"not an order archive at all"])
+    def test_not_an_archive(self, tmp_path, content):
+        """Test that other and too-short files are rejected."""
+        path = tmp_path / "orders.txt"
+        path.write_bytes(content)
+        with pytest.raises(ValueError):
+            OrderArchive(str(path), use_numpy=False)
+    
+    def test_truncated_archive(self, tmp_path):
+        """Test that an archive cut short inside its records is rejected."""
+        archive, _, _ = self.open_archive(tmp_path)
+        archive.close()
+        with open(archive.path, "rb") as f:
+            data = f.read()
+        with open(archive.path, "wb") as f:
+            f.write(data[:30])
+        with pytest.raises(ValueError):
+            OrderArchive(archive.path, use_numpy=False)
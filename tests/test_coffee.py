@@ -187,6 +187,126 @@ class TestCoffeeMethods:
         assert cappuccino.average_price() == 10.0
 
 
+class TestCoffeeAlsoOrdered:
+    """Tests for the co-purchase index behind Coffee.also_ordered."""
+    
+    def setup_method(self):
+        """Reset order tracking before each test."""
+        Customer._all_orders = []
+        Coffee._all_orders = []
+    
+    def test_also_ordered_empty(self):
+        """Test that a coffee with no orders has no related coffees."""
+        coffee = Coffee("Espresso")
+        assert coffee.also_ordered() == []
+    
+    def test_also_ordered_ranks_by_shared_customers(self):
+        """Test that related coffees are ranked by shared customer count."""
+        alice = Customer("Alice")
+        bob = Customer("Bob")
+        espresso = Coffee("Espresso")
+        latte = Coffee("Latte")
+        mocha = Coffee("Mocha")
+        
+        alice.create_order(espresso, 2.0)
+        alice.create_order(latte, 3.0)
+        alice.create_order(mocha, 4.0)
+        bob.create_order(espresso, 2.0)
+        bob.create_order(latte, 3.0)
+        
+        assert espresso.also_ordered() == [latte, mocha]
+        assert espresso.also_ordered(1) == [latte]
+        assert mocha.also_ordered() == [espresso, latte]
+    
+    def test_also_ordered_repeat_orders_count_once(self):
+        """Test that repeat orders of the same pair count one customer once."""
+        alice = Customer("Alice")
+        espresso = Coffee("Espresso")
+        latte = Coffee("Latte")
+        
+        alice.create_order(espresso, 2.0)
+        alice.create_order(latte, 3.0)
+        alice.create_order(latte, 3.5)
+        alice.create_order(espresso, 2.5)
+        
+        assert espresso._co_orders == {latte: 1}
+        assert latte._co_orders == {espresso: 1}
+    
+    def test_also_ordered_follows_order_changes(self):
+        """Test that reassigning an order's coffee updates the index."""
+        alice = Customer("Alice")
+        espresso = Coffee("Espresso")
+        latte = Coffee("Latte")
+        mocha = Coffee("Mocha")
+        
+        alice.create_order(espresso, 2.0)
+        order = alice.create_order(latte, 3.0)
+        order.coffee = mocha
+        
+        assert espresso.also_ordered() == [mocha]
+        assert latte.also_ordered() == []
+
+
+class TestCoffeePriceIndex:
+    """Tests for price range and rank queries on a coffee."""
+    
+    def setup_method(self):
+        """Reset order tracking before each test."""
+        Customer._all_orders = []
+        Coffee._all_orders = []
+    
+    def test_count_and_orders_between(self):
+        """Test counting and listing orders within a price range."""
+        customer = Customer("Alice")
+        espresso = Coffee("Espresso")
+        latte = Coffee("Latte")
+        o1 = customer.create_order(espresso, 4.0)
+        o2 = customer.create_order(espresso, 2.0)
+        customer.create_order(espresso, 6.5)
+        customer.create_order(latte, 3.0)
+        
+        assert espresso.count_between(2, 4) == 2
+        assert espresso.orders_between(2, 4) == [o2, o1]
+        assert espresso.count_between(7, 10) == 0
+        assert espresso.count_between(4, 2) == 0
+    
+    def test_price_percentile(self):
+        """Test nearest-rank price percentiles."""
+        customer = Customer("Alice")
+        coffee = Coffee("Espresso")
+        assert coffee.price_percentile(50) == 0
+        for price in range(1, 11):
+            customer.create_order(coffee, price)
+        
+        assert coffee.price_percentile(50) == 5.0
+        assert coffee.price_percentile(90) == 9.0
+        assert coffee.price_percentile(0) == 1.0
+        with pytest.raises(ValueError):
+            coffee.price_percentile(101)
+    
+    def test_orders_above_percentile(self):
+        """Test listing orders priced above a percentile."""
+        customer = Customer("Alice")
+        coffee = Coffee("Espresso")
+        orders = [customer.create_order(coffee, price) for price in range(1, 11)]
+        
+        assert coffee.orders_above_percentile(90) == [orders[9]]
+        assert coffee.orders_above_percentile(100) == []
+    
+    def test_price_index_follows_order_changes(self):
+        """Test that the price index is updated when an order changes."""
+        customer = Customer("Alice")
+        espresso = Coffee("Espresso")
+        latte = Coffee("Latte")
+        order = customer.create_order(espresso, 2.0)
+        
+        order.price = 8.0
+        assert espresso.orders_between(8, 8) == [order]
+        order.coffee = latte
+        assert espresso.count_between(1, 10) == 0
+        assert latte.orders_between(1, 10) == [order]
+
+
 class TestCoffeeNameUpdate:
     """Tests for updating coffee name."""
     
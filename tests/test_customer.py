@@ -175,6 +175,34 @@ class TestCustomerMethods:
         
         assert espresso_fan == customer1
         assert cappuccino_fan == customer2
+    
+    def test_most_aficionado_all(self):
+        """Test most_aficionado_all matches most_aficionado for every coffee."""
+        customer1 = Customer("Alice")
+        customer2 = Customer("Bob")
+        espresso = Coffee("Espresso")
+        cappuccino = Coffee("Cappuccino")
+        
+        customer2.create_order(espresso, 3.0)
+        customer1.create_order(espresso, 3.0)  # Tie: Bob ordered first
+        customer1.create_order(cappuccino, 2.0)
+        customer2.create_order(cappuccino, 4.5)
+        
+        fans = Customer.most_aficionado_all()
+        assert fans == {espresso: customer2, cappuccino: customer2}
+        assert fans[espresso] == Customer.most_aficionado(espresso)
+    
+    def test_most_aficionado_all_filter(self):
+        """Test most_aficionado_all with a coffees filter."""
+        customer = Customer("Alice")
+        espresso = Coffee("Espresso")
+        cappuccino = Coffee("Cappuccino")
+        mocha = Coffee("Mocha")
+        customer.create_order(espresso, 2.0)
+        customer.create_order(cappuccino, 2.0)
+        
+        fans = Customer.most_aficionado_all(coffees=[espresso, mocha])
+        assert fans == {espresso: customer, mocha: None}
 
 
 class TestCustomerNameUpdate:
@@ -0,0 +1,136 @@
+
+"""Tests for the order change-data-capture event stream."""
+
+import asyncio
+import threading
+import pytest
+import sys
+import os
+
+# Add parent directory to path to import our classes
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from customer import Customer
+from coffee import Coffee
+from events import CHANGED, CREATED, DROP_NEWEST, ThreadedConsumer, bus
+
+
+class TestEventStream:
+    """Tests for publishing and consuming order events."""
+    
+    def setup_method(self):
+        """Reset order tracking and subscribe before each test."""
+        Customer._all_orders = []
+        Coffee._all_orders = []
+        self.subscription = bus.subscribe(maxsize=3)
+    
+    def teardown_method(self):
+        """Unsubscribe after each test."""
+        self.subscription.close()
+    
+    def test_created_event(self):
+        """Test that creating an order emits a created event."""
+        customer = Customer("Alice")
+        coffee = Coffee("Espresso")
+        order = customer.create_order(coffee, 2.5)
+        
+        event = self.subscription.poll()
+        assert event.kind == CREATED
+        assert event.order_id == order.id
+        assert event.customer is customer
+        assert event.coffee is coffee
+        assert event.price_cents == 250
+        assert event.field is None
+        assert self.subscription.poll() is None
+    
+    def test_changed_events_carry_deltas(self):
+        """Test that setters emit changed events with the previous value."""
+        alice = Customer("Alice")
+        bob = Customer("Bob")
+        order = alice.create_order(Coffee("Espresso"), 2.5)
+        order.price = 4.0
+        order.customer = bob
+        
+        created, price, customer = self.subscription.drain()
+        assert created.seq < price.seq < customer.seq
+        assert (price.kind, price.field, price.old, price.price_cents) == (CHANGED, "price", 250, 400)
+        assert (customer.field, customer.old, customer.customer) == ("customer", alice, bob)
+    
+    def test_drop_oldest_when_full(self):
+        """Test that a full queue drops its oldest events by default."""
+        customer = Customer("Alice")
+        coffee = Coffee("Espresso")
+        orders = [customer.create_order(coffee, price) for price in (1, 2, 3, 4, 5)]
+        
+        assert self.subscription.full
+        assert bus.saturated()
+        assert self.subscription.dropped == 2
+        assert [e.order_id for e in self.subscription.drain()] == [o.id for o in orders[2:]]
+        assert not bus.saturated()
+    
+    def test_drop_newest_when_full(self):
+        """Test the drop_newest policy keeps the oldest events."""
+        subscription = bus.subscribe(maxsize=2, policy=DROP_NEWEST)
+        try:
+            customer = Customer("Alice")
+            coffee = Coffee("Espresso")
+            orders = [customer.create_order(coffee, price) for price in (1, 2, 3)]
+            assert [e.order_id for e in subscription.drain()] == [o.id for o in orders[:2]]
+            assert subscription.dropped == 1
+        finally:
+            subscription.close()
+    
+    def test_invalid_subscription(self):
+        """Test that invalid sizes and policies raise ValueError."""
+        with pytest.raises(ValueError):
+            bus.subscribe(maxsize=0)
+        with pytest.raises(ValueError):
+            bus.subscribe(policy="block")
+    
+    def test_closed_subscription_receives_nothing(self):
+        """Test that closing a subscription stops delivery."""
+        self.subscription.close()
+        Customer("Alice").create_order(Coffee("Espresso"), 2.5)
+        assert self.subscription.poll() is None
+    
+    def test_threaded_consumer(self):
+        """Test that a threaded consumer handles every event."""
+        received = []
+        done = threading.Event()
+        
+        def handler(event):
+            received.append(event.order_id)
+            done.set()
+        
+        consumer = ThreadedConsumer(self.subscription, handler, poll_interval=0.01)
+        order = Customer("Alice").create_order(Coffee("Espresso"), 2.5)
+        assert done.wait(1)
+        consumer.stop()
+        assert received == [order.id]
+    
+    def test_asyncio_consumer(self):
+        """Test that an asyncio consumer is woken by new events."""
+        async def scenario():
+            waiting = asyncio.create_task(self.subscription.aget())
+            await asyncio.sleep(0)
+            order = Customer("Alice").create_order(Coffee("Espresso"), 2.5)
+            event = await asyncio.wait_for(waiting, 1)
+            return event, order
+        
+        event, order = asyncio.run(scenario())
+        assert event.order_id == order.id
+    
+    def test_timed_out_asyncio_consumer(self):
+        """Test that an abandoned aget() on a closed loop cannot fail order placement."""
+        async def scenario():
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(self.subscription.aget(), 0.01)
+        
+        asyncio.run(scenario())
+        assert self.subscription._async_waiters == []
+        
+        loop = asyncio.new_event_loop()
+        self.subscription._async_waiters.append((loop, loop.create_future()))
+        loop.close()
+        order = Customer("Alice").create_order(Coffee("Espresso"), 2.5)
+        assert self.subscription.poll().order_id == order.id
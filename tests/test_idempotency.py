@@ -0,0 +1,188 @@
+
+"""Tests for idempotent order submission."""
+
+import pytest
+import threading
+import sys
+import os
+
+# Add parent directory to path to import our classes
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from customer import Customer
+from coffee import Coffee
+from idempotency import BloomFilter, IdempotencyCache
+
+
+class FakeClock:
+    """A manually advanced clock."""
+    
+    def __init__(self):
+        """Start the clock at zero."""
+        self.now = 0.0
+    
+    def __call__(self):
+        """Get the current time."""
+        return self.now
+
+
+class TestBloomFilter:
+    """Tests for the Bloom filter."""
+    
+    def test_no_false_negatives(self):
+        """Test that every added key is reported as present."""
+        bloom = BloomFilter(1000)
+        keys = [f"sale-{i}" for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        assert all(key in bloom for key in keys)
+    
+    def test_false_positive_rate(self):
+        """Test that the false positive rate stays near its target."""
+        bloom = BloomFilter(1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"sale-{i}")
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        assert false_positives < 300
+    
+    def test_clear(self):
+        """Test that clearing removes all keys."""
+        bloom = BloomFilter(10)
+        bloom.add("sale-1")
+        bloom.clear()
+        assert "sale-1" not in bloom
+    
+    def test_invalid_arguments(self):
+        """Test that invalid sizes raise ValueError."""
+        with pytest.raises(ValueError):
+            BloomFilter(0)
+        with pytest.raises(ValueError):
+            BloomFilter(10, error_rate=1.5)
+
+
+class TestIdempotencyCache:
+    """Tests for the bounded idempotency cache."""
+    
+    @pytest.mark.parametrize("bloom", [False, True])
+    def test_duplicate_returns_first_result(self, bloom):
+        """Test that a repeated key returns the first result."""
+        cache = IdempotencyCache(bloom=bloom)
+        assert cache.get_or_create("sale-1", lambda: "first") == ("first", True)
+        assert cache.get_or_create("sale-1", lambda: "second") == ("first", False)
+        assert cache.get_or_create("sale-2", lambda: "third") == ("third", True)
+    
+    @pytest.mark.parametrize("bloom", [False, True])
+    def test_memory_is_bounded(self, bloom):
+        """Test that at most capacity keys are remembered."""
+        cache = IdempotencyCache(capacity=100, bloom=bloom)
+        for i in range(1000):
+            cache.get_or_create(i, lambda: i)
+        assert len(cache) == 100
+        assert cache.get_or_create(999, lambda: None) == (999, False)
+    
+    @pytest.mark.parametrize("bloom", [False, True])
+    def test_keys_expire_after_window(self, bloom):
+        """Test that keys are forgotten once the window has passed."""
+        clock = FakeClock()
+        cache = IdempotencyCache(window=60, bloom=bloom, clock=clock)
+        cache.get_or_create("sale-1", lambda: "first")
+        clock.now = 59
+        assert cache.get_or_create("sale-1", lambda: "second") == ("first", False)
+        clock.now = 121
+        assert cache.get_or_create("sale-1", lambda: "third") == ("third", True)
+    
+    def test_bloom_rotation_keeps_recent_keys(self):
+        """Test that keys survive one Bloom filter rotation."""
+        clock = FakeClock()
+        cache = IdempotencyCache(window=60, bloom=True, clock=clock)
+        clock.now = 50
+        cache.get_or_create("sale-1", lambda: "first")
+        clock.now = 100
+        assert cache.get_or_create("sale-1", lambda: "second") == ("first", False)
+    
+    def test_fingerprint_mismatch_raises(self):
+        """Test that reusing a key for a different submission is rejected."""
+        cache = IdempotencyCache()
+        cache.get_or_create("sale-1", lambda: "first", fingerprint=("Alice", 250))
+        assert cache.get_or_create("sale-1", lambda: "second", fingerprint=("Alice", 250)) == ("first", False)
+        with pytest.raises(ValueError):
+            cache.get_or_create("sale-1", lambda: "third", fingerprint=("Bob", 250))
+    
+    def test_creation_runs_outside_the_cache_lock(self):
+        """Test that a slow creation blocks only submissions with the same key."""
+        cache = IdempotencyCache()
+        started, release = threading.Event(), threading.Event()
+        
+        def slow():
+            started.set()
+            release.wait(5)
+            return "slow"
+        
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_create("sale-1", slow)))]
+        threads.append(threading.Thread(target=lambda: results.append(cache.get_or_create("sale-1", slow))))
+        threads[0].start()
+        started.wait(5)
+        threads[1].start()
+        assert cache.get_or_create("sale-2", lambda: "fast") == ("fast", True)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        assert sorted(results) == [("slow", False), ("slow", True)]
+    
+    def test_invalid_arguments(self):
+        """Test that invalid sizes raise ValueError."""
+        with pytest.raises(ValueError):
+            IdempotencyCache(capacity=0)
+        with pytest.raises(ValueError):
+            IdempotencyCache(window=0)
+
+
+class TestIdempotentCreateOrder:
+    """Tests for idempotency keys on Customer.create_order."""
+    
+    def setup_method(self):
+        """Reset order tracking and remembered keys before each test."""
+        Customer._all_orders = []
+        Coffee._all_orders = []
+        Customer._idempotency = IdempotencyCache()
+    
+    def test_retry_does_not_duplicate_order(self):
+        """Test that a retried sale is only recorded once."""
+        customer = Customer("Alice")
+        coffee = Coffee("Espresso")
+        first = customer.create_order(coffee, 2.5, idempotency_key="pos-1-0001")
+        retry = customer.create_order(coffee, 2.5, idempotency_key="pos-1-0001")
+        
+        assert retry is first
+        assert coffee.num_orders() == 1
+        assert customer.orders() == [first]
+    
+    def test_distinct_keys_create_orders(self):
+        """Test that different keys create different orders."""
+        customer = Customer("Alice")
+        coffee = Coffee("Espresso")
+        customer.create_order(coffee, 2.5, idempotency_key="pos-1-0001")
+        customer.create_order(coffee, 2.5, idempotency_key="pos-1-0002")
+        customer.create_order(coffee, 2.5)
+        assert coffee.num_orders() == 3
+    
+    def test_invalid_order_is_not_remembered(self):
+        """Test that a failed submission can be retried with the same key."""
+        customer = Customer("Alice")
+        coffee = Coffee("Espresso")
+        with pytest.raises(ValueError):
+            customer.create_order(coffee, 50, idempotency_key="pos-1-0001")
+        order = customer.create_order(coffee, 5, idempotency_key="pos-1-0001")
+        assert order.price == 5.0
+    
+    def test_key_reused_for_different_order(self):
+        """Test that a key cannot silently return an unrelated order."""
+        customer = Customer("Alice")
+        coffee = Coffee("Espresso")
+        customer.create_order(coffee, 2.5, idempotency_key="pos-1-0001")
+        with pytest.raises(ValueError):
+            customer.create_order(coffee, 3.0, idempotency_key="pos-1-0001")
+        with pytest.raises(ValueError):
+            Customer("Bob").create_order(coffee, 2.5, idempotency_key="pos-1-0001")
+        assert coffee.num_orders() == 1
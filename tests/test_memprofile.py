@@ -0,0 +1,60 @@
+
+"""Tests for the memory profiling report."""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path to import our classes
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from customer import Customer
+from coffee import Coffee
+from memprofile import format_report, main, profile_shop
+
+
+class TestMemoryProfile:
+    """Tests for profile_shop and format_report."""
+    
+    def setup_method(self):
+        """Reset order tracking before each test."""
+        Customer._all_orders = []
+        Coffee._all_orders = []
+    
+    def test_profile_reports_every_measurement(self):
+        """Test that the profile covers entities, the ledger and queries."""
+        report = profile_shop(customers=20, coffees=3, orders=500)
+        
+        for key in ("customer.bytes_each", "coffee.bytes_each", "order.bytes_each"):
+            assert report[key] > 0
+        assert report["all_orders.bytes_per_order"] > 0
+        assert report["query.coffee_customers.peak_bytes"] > 0
+        assert report["query.most_aficionado.peak_bytes"] > 0
+        assert len(Coffee._all_orders) == 500
+    
+    def test_profile_keys_are_stable(self):
+        """Test that every run reports the same measurements, for diffing."""
+        first = profile_shop(customers=20, coffees=3, orders=500)
+        second = profile_shop(customers=10, coffees=2, orders=100)
+        assert sorted(first) == sorted(second)
+    
+    def test_format_report_is_sorted(self):
+        """Test that the report lists measurements in sorted order."""
+        text = format_report({"b.peak": 2, "a.each": 1}, "run")
+        assert text == "# run\na.each 1\nb.peak 2\n"
+    
+    def test_profile_rejects_empty_shop(self):
+        """Test that profiling zero customers, coffees or orders raises ValueError."""
+        with pytest.raises(ValueError):
+            profile_shop(customers=0, coffees=3, orders=500)
+        with pytest.raises(ValueError):
+            profile_shop(customers=20, coffees=3, orders=0)
+    
+    @pytest.mark.parametrize("flag", ["--customers", "--coffees", "--orders"])
+    def test_main_rejects_non_positive_counts(self, flag, capsys):
+        """Test that the command line rejects zero and negative sizes."""
+        for value in ("0", "-5"):
+            with pytest.raises(SystemExit) as exc_info:
+                main([flag, value])
+            assert exc_info.value.code == 2
+            assert "must be at least 1" in capsys.readouterr().err
@@ -165,6 +165,64 @@ class TestOrderProperties:
             order.price = 15.0
 
 
+class TestOrderPriceCents:
+    """Tests for integer-cents price storage."""
+    
+    def setup_method(self):
+        """Reset order tracking before each test."""
+        Customer._all_orders = []
+        Coffee._all_orders = []
+    
+    def test_price_stored_as_cents(self):
+        """Test that prices are stored as integer cents."""
+        order = Order(Customer("Alice"), Coffee("Espresso"), 2.5)
+        assert order.price_cents == 250
+        assert isinstance(order.price_cents, int)
+        assert order.price == 2.5
+    
+    def test_price_rounded_to_cents(self):
+        """Test that sub-cent prices are rounded to the nearest cent."""
+        order = Order(Customer("Alice"), Coffee("Espresso"), 3.333)
+        assert order.price_cents == 333
+        assert order.price == 3.33
+    
+    def test_integer_price(self):
+        """Test that integer prices are accepted."""
+        order = Order(Customer("Alice"), Coffee("Espresso"), 10)
+        assert order.price_cents == 1000
+    
+    def test_average_price_is_exact(self):
+        """Test that averages do not accumulate float rounding drift."""
+        customer = Customer("Alice")
+        coffee = Coffee("Espresso")
+        for _ in range(3):
+            customer.create_order(coffee, 1.1)
+        assert coffee.average_price() == 1.1
+    
+    def test_total_price_in_bulk(self):
+        """Test exact bulk totals over the integer price column."""
+        customer = Customer("Alice")
+        coffee = Coffee("Espresso")
+        orders = [customer.create_order(coffee, 1.1) for _ in range(10)]
+        
+        assert list(Order.price_cents_array(orders)) == [110] * 10
+        assert Order.total_price(orders) == 11.0
+        assert Order.total_price() == 11.0
+    
+    def test_non_finite_price_keeps_order_indexed(self):
+        """Test that NaN and infinite prices are rejected without unindexing the order."""
+        customer = Customer("Alice")
+        coffee = Coffee("Espresso")
+        order = customer.create_order(coffee, 2.5)
+        
+        for value in (float("nan"), float("inf")):
+            with pytest.raises(ValueError):
+                order.price = value
+        assert order.price == 2.5
+        assert customer._indexed_orders() == [order]
+        assert coffee.orders_between(2.5, 2.5) == [order]
+
+
 class TestOrderIntegration:
     """Integration tests for Order with Customer and Coffee."""
     
@@ -0,0 +1,107 @@
+
+"""Tests for the index-aware query engine."""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path to import our classes
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from customer import Customer
+from coffee import Coffee
+from query import orders
+
+
+class TestQuery:
+    """Tests for filtering, grouping and planning."""
+    
+    def setup_method(self):
+        """Reset order tracking and build a small shop before each test."""
+        Customer._all_orders = []
+        Coffee._all_orders = []
+        self.alice = Customer("Alice")
+        self.bob = Customer("Bob")
+        self.espresso = Coffee("Espresso")
+        self.latte = Coffee("Latte")
+        self.o1 = self.alice.create_order(self.espresso, 2.0)
+        self.o2 = self.alice.create_order(self.espresso, 3.5)
+        self.o3 = self.bob.create_order(self.espresso, 5.0)
+        self.o4 = self.bob.create_order(self.latte, 4.0)
+        self.o5 = self.alice.create_order(self.latte, 9.0)
+    
+    def test_unfiltered_query_returns_all_orders(self):
+        """Test that the root query returns every order."""
+        assert orders.all() == [self.o1, self.o2, self.o3, self.o4, self.o5]
+        assert orders.count() == 5
+        assert orders.sum("price") == 23.5
+    
+    def test_where_coffee_and_price(self):
+        """Test combining a coffee filter with a price range."""
+        result = orders.where(coffee=self.espresso, price_between=(2, 4))
+        assert sorted(result.all(), key=lambda o: o.id) == [self.o1, self.o2]
+        assert result.sum() == 5.5
+    
+    def test_group_by_customer_sum(self):
+        """Test grouping by customer and summing prices."""
+        result = orders.where(coffee=self.espresso).group_by("customer").sum("price")
+        assert result == {self.alice: 5.5, self.bob: 5.0}
+    
+    def test_group_by_coffee_count_and_average(self):
+        """Test grouping by coffee with count and average."""
+        grouped = orders.where(customer=self.alice).group_by("coffee")
+        assert grouped.count() == {self.espresso: 2, self.latte: 1}
+        assert grouped.average() == {self.espresso: 2.75, self.latte: 9.0}
+    
+    def test_empty_average(self):
+        """Test that an average over no orders is 0."""
+        assert orders.where(price_between=(9.5, 10)).average() == 0
+    
+    def test_planner_picks_smallest_index(self):
+        """Test that the planner chooses the cheapest available index."""
+        assert orders.plan().index == "scan"
+        assert orders.where(customer=self.bob).plan().index == "customer"
+        plan = orders.where(customer=self.alice, coffee=self.latte).plan()
+        assert plan.index == "coffee"
+        assert plan.rows == 2
+        assert plan.residual == ["customer"]
+        assert orders.where(price_between=(9, 10)).plan().index == "price"
+        plan = orders.where(coffee=self.espresso, price_between=(2, 4)).plan()
+        assert plan.index == "coffee_price"
+        assert plan.rows == 2
+        assert plan.residual == []
+    
+    def test_explain(self):
+        """Test the textual plan."""
+        query = orders.where(coffee=self.latte, price_between=(1, 10)).group_by("customer")
+        assert query.explain() == (
+            "index coffee_price Latte 1.00..10.00 (~2 rows)\n"
+            "group by customer"
+        )
+        assert orders.where(price_between=(4, 5)).explain() == "index price 4.00..5.00 (~2 rows)"
+        assert orders.where(customer=self.bob, coffee=self.espresso).explain() == (
+            "index customer Bob (~2 rows)\n"
+            "filter coffee"
+        )
+    
+    def test_price_index_follows_order_changes(self):
+        """Test that the price index is updated when an order's price changes."""
+        self.o1.price = 9.5
+        assert orders.where(price_between=(9.5, 9.5)).all() == [self.o1]
+        assert orders.where(price_between=(2, 2)).all() == []
+    
+    def test_price_query_merges_coffees(self):
+        """Test that price-only queries merge every coffee's index in price order."""
+        assert orders.where(price_between=(3, 9)).all() == [self.o2, self.o4, self.o3, self.o5]
+        Customer._all_orders = []
+        Coffee._all_orders = []
+        assert orders.where(price_between=(1, 10)).all() == []
+    
+    def test_invalid_arguments(self):
+        """Test that invalid grouping, fields and ranges raise ValueError."""
+        with pytest.raises(ValueError):
+            orders.group_by("price")
+        with pytest.raises(ValueError):
+            orders.sum("customer")
+        with pytest.raises(ValueError):
+            orders.where(price_between=(5, 2))
@@ -0,0 +1,101 @@
+
+"""Tests for RFM customer segmentation."""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path to import our classes
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from customer import Customer
+from coffee import Coffee
+from rfm import build_columns, compute_rfm, segment
+
+
+class TestRFM:
+    """Tests for compute_rfm."""
+    
+    def setup_method(self):
+        """Reset order tracking and build a small shop before each test."""
+        Customer._all_orders = []
+        Coffee._all_orders = []
+        coffee = Coffee("Espresso")
+        self.regular = Customer("Regular")
+        self.lapsed = Customer("Lapsed")
+        self.newcomer = Customer("Newcomer")
+        for _ in range(4):
+            self.lapsed.create_order(coffee, 5.0)
+        for _ in range(3):
+            self.regular.create_order(coffee, 2.0)
+        self.newcomer.create_order(coffee, 9.0)
+        self.regular.create_order(coffee, 2.0)
+    
+    def test_build_columns(self):
+        """Test that the ledger is turned into integer columns in order."""
+        customers, codes, ids, cents = build_columns()
+        assert customers == [self.lapsed, self.regular, self.newcomer]
+        assert list(codes) == [0, 0, 0, 0, 1, 1, 1, 2, 1]
+        assert list(cents) == [500] * 4 + [200] * 3 + [900, 200]
+        assert list(ids) == sorted(ids)
+    
+    def test_raw_values(self):
+        """Test recency (orders since last), frequency and monetary values."""
+        scores = compute_rfm(use_numpy=False).scores
+        assert scores[self.regular][:3] == (0, 4, 8.0)
+        assert scores[self.newcomer][:3] == (1, 1, 9.0)
+        assert scores[self.lapsed][:3] == (5, 4, 20.0)
+    
+    def test_scores_rank_customers(self):
+        """Test that scores rank customers and ties share a score."""
+        scores = compute_rfm(bins=3, use_numpy=False).scores
+        assert (scores[self.regular].r, scores[self.newcomer].r, scores[self.lapsed].r) == (3, 2, 1)
+        assert scores[self.regular].f == scores[self.lapsed].f == 2
+        assert scores[self.newcomer].f == 1
+        assert scores[self.lapsed].m == 3
+    
+    def test_segments_and_stats(self):
+        """Test segment assignment and per-segment totals."""
+        result = compute_rfm(bins=5, use_numpy=False)
+        assert set(result.segments.values()) <= set(result.stats)
+        assert sum(s["customers"] for s in result.stats.values()) == 3
+        assert sum(s["orders"] for s in result.stats.values()) == 9
+        assert sum(s["revenue"] for s in result.stats.values()) == 37.0
+        for name, totals in result.stats.items():
+            assert totals["average_monetary"] == totals["revenue"] / totals["customers"]
+    
+    def test_segment_rules(self):
+        """Test the segment boundaries."""
+        assert segment(5, 5) == "champions"
+        assert segment(3, 4) == "loyal"
+        assert segment(5, 1) == "new"
+        assert segment(1, 3) == "at_risk"
+        assert segment(2, 1) == "hibernating"
+        assert segment(3, 3) == "regular"
+    
+    def test_segment_rules_scale_with_bins(self):
+        """Test that every segment is reachable with fewer bins."""
+        assert segment(3, 3, bins=3) == "champions"
+        assert segment(2, 3, bins=3) == "loyal"
+        assert segment(3, 1, bins=3) == "new"
+        assert segment(1, 2, bins=3) == "at_risk"
+        assert segment(1, 1, bins=3) == "hibernating"
+        assert segment(2, 2, bins=3) == "regular"
+        segments = compute_rfm(bins=3, use_numpy=False).segments
+        assert segments[self.lapsed] == "at_risk"
+    
+    def test_empty_ledger(self):
+        """Test that no orders gives an empty result."""
+        Customer._all_orders = []
+        Coffee._all_orders = []
+        assert compute_rfm() == ({}, {}, {})
+    
+    def test_invalid_bins(self):
+        """Test that fewer than one bin raises ValueError."""
+        with pytest.raises(ValueError):
+            compute_rfm(bins=0)
+    
+    def test_numpy_matches_python(self):
+        """Test that the NumPy path gives the same result as plain Python."""
+        pytest.importorskip("numpy")
+        assert compute_rfm(use_numpy=True) == compute_rfm(use_numpy=False)
@@ -0,0 +1,153 @@
+
+"""Tests for the HTTP/JSON server and load generator."""
+
+import asyncio
+import sys
+import os
+
+# Add parent directory to path to import our classes
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from customer import Customer
+from coffee import Coffee
+from server import ShopServer
+from loadgen import Client, percentile, run_load
+
+
+def run_with_server(scenario):
+    """Run an async scenario against a server on a free port."""
+    async def runner():
+        server = ShopServer(port=0, batch_size=4)
+        await server.start()
+        client = Client(server.host, server.port)
+        await client.connect()
+        try:
+            return await scenario(server, client)
+        finally:
+            await client.close()
+            await server.close()
+    return asyncio.run(runner())
+
+
+class TestShopServer:
+    """Tests for the HTTP/JSON endpoints."""
+    
+    def setup_method(self):
+        """Reset order tracking before each test."""
+        Customer._all_orders = []
+        Coffee._all_orders = []
+    
+    def test_create_order_and_query_on_one_connection(self):
+        """Test that requests share one keep-alive connection."""
+        async def scenario(server, client):
+            responses = [
+                await client.request("POST", "/orders", {"customer": "Alice", "coffee": "Espresso", "price": 2.0}),
+                await client.request("POST", "/orders", {"customer": "Bob", "coffee": "Espresso", "price": 4.0}),
+                await client.request("GET", "/coffees/Espresso/average_price"),
+                await client.request("GET", "/coffees/Espresso/customers"),
+                await client.request("GET", "/coffees/Espresso/most_aficionado"),
+            ]
+            return responses
+        
+        responses = run_with_server(scenario)
+        assert responses[0] == (201, {"customer": "Alice", "coffee": "Espresso", "price": 2.0})
+        assert responses[2] == (200, {"coffee": "Espresso", "average_price": 3.0})
+        assert responses[3] == (200, {"coffee": "Espresso", "customers": ["Alice", "Bob"]})
+        assert responses[4] == (200, {"coffee": "Espresso", "customer": "Bob"})
+    
+    def test_concurrent_orders_are_all_applied(self):
+        """Test that concurrent orders are all applied by the order writer."""
+        async def scenario(server, client):
+            clients = [Client(server.host, server.port) for _ in range(10)]
+            for c in clients:
+                await c.connect()
+            await asyncio.gather(*(
+                c.request("POST", "/orders", {"customer": "Alice", "coffee": "Latte", "price": 3.0})
+                for c in clients
+            ))
+            for c in clients:
+                await c.close()
+            return await client.request("GET", "/coffees/Latte/average_price")
+        
+        assert run_with_server(scenario) == (200, {"coffee": "Latte", "average_price": 3.0})
+        assert len(Coffee._all_orders) == 10
+    
+    def test_invalid_order_returns_400(self):
+        """Test that validation errors are reported as 400 responses."""
+        async def scenario(server, client):
+            return [
+                await client.request("POST", "/orders", {"customer": "Alice", "coffee": "Espresso", "price": 50}),
+                await client.request("POST", "/orders", {"customer": "Alice"}),
+            ]
+        
+        too_expensive, missing_fields = run_with_server(scenario)
+        assert too_expensive == (400, {"error": "Price must be between 1.0 and 10.0."})
+        assert missing_fields[0] == 400
+        assert Coffee._all_orders == []
+    
+    def test_unknown_coffee_and_route_return_404(self):
+        """Test that unknown coffees and routes are reported as 404."""
+        async def scenario(server, client):
+            return [
+                (await client.request("GET", "/coffees/Mocha/average_price"))[0],
+                (await client.request("GET", "/menu"))[0],
+                (await client.request("GET", "/orders"))[0],
+            ]
+        
+        assert run_with_server(scenario) == [404, 404, 405]
+    
+    def test_negative_content_length_returns_400(self):
+        """Test that a negative Content-Length is rejected instead of read."""
+        async def scenario(server, client):
+            reader, writer = await asyncio.open_connection(server.host, server.port)
+            writer.write(b"POST /orders HTTP/1.1\r\nContent-Length: -5\r\n\r\n")
+            await writer.drain()
+            status_line = await reader.readline()
+            writer.close()
+            return status_line
+        
+        assert run_with_server(scenario).startswith(b"HTTP/1.1 400")
+    
+    def test_unexpected_error_returns_500(self):
+        """Test that an unexpected failure is a 500 and does not stop the order writer."""
+        def broken(*request):
+            raise RuntimeError("boom")
+        
+        async def scenario(server, client):
+            apply_order = server._apply_order
+            server._apply_order = broken
+            failed = await client.request("POST", "/orders", {"customer": "Alice", "coffee": "Latte", "price": 3.0})
+            server._apply_order = apply_order
+            created = await client.request("POST", "/orders", {"customer": "Alice", "coffee": "Latte", "price": 3.0})
+            return failed, created[0]
+        
+        failed, created = run_with_server(scenario)
+        assert failed == (500, {"error": "Could not create order: boom"})
+        assert created == 201
+
+
+class TestLoadGenerator:
+    """Tests for the bundled load generator."""
+    
+    def setup_method(self):
+        """Reset order tracking before each test."""
+        Customer._all_orders = []
+        Coffee._all_orders = []
+    
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        values = list(range(1, 101))
+        assert percentile(values, 0.50) == 50
+        assert percentile(values, 0.99) == 99
+        assert percentile([], 0.5) == 0
+    
+    def test_run_load_reports_stats(self):
+        """Test that a small load run reports every request."""
+        async def scenario(server, client):
+            return await run_load(server.host, server.port, concurrency=4, requests=200)
+        
+        results = run_with_server(scenario)
+        assert results["requests"] == 200
+        assert results["errors"] == 0
+        assert results["rps"] > 0
+        assert results["p50_ms"] <= results["p99_ms"]
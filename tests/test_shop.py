@@ -0,0 +1,48 @@
+
+"""Tests for the lazy shop entry point."""
+
+import pytest
+import subprocess
+import sys
+import os
+
+# Add parent directory to path to import our classes
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import shop
+from customer import Customer
+from order import Order
+
+
+class TestShop:
+    """Tests for the shop module."""
+    
+    def test_exports(self):
+        """Test that exported names resolve to the defining modules' objects."""
+        assert shop.Customer is Customer
+        assert shop.Order is Order
+        assert set(shop.__all__) <= set(dir(shop))
+    
+    def test_unknown_name(self):
+        """Test that unknown attributes raise AttributeError."""
+        with pytest.raises(AttributeError):
+            shop.Teapot
+    
+    def test_order_factory_installed(self):
+        """Test that importing order removes the lazy import from create_order."""
+        assert Customer._order_factory is Order
+    
+    def test_lazy_imports(self):
+        """Test that order and asyncio are only imported when first needed."""
+        code = (
+            "import sys, shop\n"
+            "customer = shop.Customer('Alice')\n"
+            "print('order' in sys.modules, 'asyncio' in sys.modules)\n"
+            "order = customer.create_order(shop.Coffee('Espresso'), 3.0)\n"
+            "print('order' in sys.modules, 'asyncio' in sys.modules, order.price)\n"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        assert output.split("\n")[:2] == ["False False", "True False 3.0"]
@@ -0,0 +1,163 @@
+
+"""Tests for point-in-time snapshots."""
+
+import random
+import sys
+import os
+import threading
+
+# Add parent directory to path to import our classes
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from customer import Customer
+from coffee import Coffee
+from snapshot import _live, snapshot
+from store import StoreRegistry
+
+
+class TestSnapshot:
+    """Tests for Snapshot queries and copy-on-write behaviour."""
+    
+    def setup_method(self):
+        """Reset order tracking and build a small shop before each test."""
+        Customer._all_orders = []
+        Coffee._all_orders = []
+        self.alice = Customer("Alice")
+        self.bob = Customer("Bob")
+        self.espresso = Coffee("Espresso")
+        self.latte = Coffee("Latte")
+        self.order1 = self.alice.create_order(self.espresso, 2.0)
+        self.order2 = self.bob.create_order(self.espresso, 3.0)
+    
+    def test_snapshot_ignores_new_orders(self):
+        """Test that orders created after the snapshot are not visible."""
+        with snapshot() as snap:
+            self.bob.create_order(self.espresso, 9.0)
+            self.alice.create_order(self.latte, 4.0)
+            
+            assert snap.num_orders(self.espresso) == 2
+            assert snap.average_price(self.espresso) == 2.5
+            assert snap.most_aficionado(self.espresso) == self.bob
+            assert snap.coffees(self.alice) == [self.espresso]
+            assert snap.num_orders(self.latte) == 0
+        assert self.espresso.num_orders() == 3
+    
+    def test_snapshot_keeps_values_of_changed_orders(self):
+        """Test that changing an order after the snapshot does not affect it."""
+        with snapshot() as snap:
+            self.order1.price = 9.0
+            self.order2.coffee = self.latte
+            self.order2.customer = self.alice
+            
+            views = snap.orders()
+            assert [(v.customer, v.coffee, v.price) for v in views] == [
+                (self.alice, self.espresso, 2.0),
+                (self.bob, self.espresso, 3.0),
+            ]
+            assert sorted(c.name for c in snap.customers(self.espresso)) == ["Alice", "Bob"]
+            assert snap.coffee_orders(self.latte) == []
+            assert [v.id for v in snap.customer_orders(self.bob)] == [self.order2.id]
+        assert self.espresso.orders() == [self.order1]
+    
+    def test_results_are_repeatable(self):
+        """Test that the same query gives the same answer as writes continue."""
+        with snapshot() as snap:
+            first = snap.average_price(self.espresso)
+            self.alice.create_order(self.espresso, 10.0)
+            self.order2.price = 1.0
+            assert snap.average_price(self.espresso) == first
+    
+    def test_snapshot_works_with_model_queries(self):
+        """Test that a snapshot can be passed to the model's store= queries."""
+        with snapshot() as snap:
+            self.alice.create_order(self.espresso, 10.0)
+            assert self.espresso.average_price(snap) == 2.5
+            assert self.espresso.num_orders(snap) == 2
+            assert Customer.most_aficionado(self.espresso, snap) == self.bob
+    
+    def test_queries_read_indexes_not_a_copy(self):
+        """Test that queries only keep before-images of changed orders."""
+        snap = snapshot()
+        assert snap.num_orders(self.espresso) == 2
+        assert snap in _live
+        assert snap._before == {}
+        self.order1.price = 5.0
+        assert list(snap._before) == [self.order1]
+        assert snap.average_price(self.espresso) == 2.5
+    
+    def test_released_snapshot_stops_tracking(self):
+        """Test that writers stop saving before-images for released snapshots."""
+        snap = snapshot()
+        snap.release()
+        assert snap not in _live
+        self.order1.price = 5.0
+        assert snap._before == {}
+    
+    def test_empty_snapshot(self):
+        """Test a snapshot of an empty ledger."""
+        Customer._all_orders = []
+        Coffee._all_orders = []
+        with snapshot() as snap:
+            assert snap.orders() == []
+            assert snap.average_price(self.espresso) == 0
+            assert snap.most_aficionado(self.espresso) is None
+    
+    def test_snapshot_waits_for_orders_being_indexed(self):
+        """Test that a snapshot includes an order appended to the ledger but not yet indexed."""
+        store = StoreRegistry().store("Downtown")
+        indexing, release = threading.Event(), threading.Event()
+        add = store._add
+        
+        def slow_add(order):
+            indexing.set()
+            release.wait(5)
+            add(order)
+        
+        store._add = slow_add
+        writer = threading.Thread(target=self.alice.create_order, args=(self.latte, 4.0, store))
+        writer.start()
+        indexing.wait(5)
+        snaps = []
+        reader = threading.Thread(target=lambda: snaps.append(snapshot()))
+        reader.start()
+        reader.join(0.1)
+        assert snaps == []
+        release.set()
+        writer.join()
+        reader.join()
+        assert [view.price for view in snaps[0].coffee_orders(self.latte)] == [4.0]
+        snaps[0].release()
+    
+    def test_snapshots_during_concurrent_writes(self):
+        """Test that snapshots taken while stores place orders see exactly their ledger prefix."""
+        registry = StoreRegistry()
+        customers = [self.alice, self.bob]
+        coffees = [self.espresso, self.latte]
+        interval = sys.getswitchinterval()
+        
+        def place_orders(name):
+            store = registry.store(name)
+            rng = random.Random(name)
+            for _ in range(3000):
+                rng.choice(customers).create_order(rng.choice(coffees), 2.0, store)
+        
+        threads = [threading.Thread(target=place_orders, args=(f"S{i}",)) for i in range(4)]
+        sys.setswitchinterval(1e-6)
+        try:
+            for thread in threads:
+                thread.start()
+            finished = False
+            while not finished:
+                finished = not any(thread.is_alive() for thread in threads)
+                with snapshot() as snap:
+                    ledger = [view.id for view in snap.orders()]
+                    assert ledger == sorted(ledger)
+                    assert ledger[-1] == snap._last_id
+                    indexed = sorted(
+                        view.id for coffee in coffees for view in snap.coffee_orders(coffee)
+                    )
+                    assert indexed == ledger
+        finally:
+            for thread in threads:
+                thread.join()
+            sys.setswitchinterval(interval)
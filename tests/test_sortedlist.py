@@ -0,0 +1,57 @@
+"""Tests for the chunked SortedList."""
+
+import pytest
+import random
+import sys
+import os
+
+# Add parent directory to path to import our classes
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sortedlist import SortedList
+
+
+class TestSortedList:
+    """Tests for SortedList against a plain sorted list."""
+    
+    def test_matches_sorted_list(self):
+        """Test inserts, removals, ranks and slices across many chunk splits."""
+        rng = random.Random(0)
+        items = SortedList(chunk_size=4)
+        expected = []
+        for _ in range(2000):
+            value = rng.randrange(100)
+            if expected and rng.random() < 0.3:
+                value = rng.choice(expected)
+                items.remove(value)
+                expected.remove(value)
+            else:
+                items.add(value)
+                expected.append(value)
+                expected.sort()
+            probe = rng.randrange(-1, 101)
+            assert items.bisect_left(probe) == sum(1 for v in expected if v < probe)
+            assert items.bisect_right(probe) == sum(1 for v in expected if v <= probe)
+        assert len(items) == len(expected)
+        assert list(items) == expected
+        assert items[10:50] == expected[10:50]
+        assert items[-1] == expected[-1]
+        assert [items[i] for i in range(len(expected))] == expected
+    
+    def test_empty(self):
+        """Test queries on an empty list."""
+        items = SortedList()
+        assert len(items) == 0
+        assert items.bisect_left(5) == 0
+        assert items[0:3] == []
+        with pytest.raises(IndexError):
+            items[0]
+    
+    def test_remove_missing_value(self):
+        """Test that removing a value that is not present raises ValueError."""
+        items = SortedList()
+        items.add(3)
+        with pytest.raises(ValueError):
+            items.remove(4)
+        with pytest.raises(ValueError):
+            items.remove(1)
@@ -0,0 +1,193 @@
+
+"""Tests for the Store and StoreRegistry classes."""
+
+import pytest
+import random
+import sys
+import os
+import threading
+
+# Add parent directory to path to import our classes
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from customer import Customer
+from coffee import Coffee
+from order import Order
+from store import Store, StoreRegistry
+
+
+class TestStoreInitialization:
+    """Tests for Store initialization and properties."""
+    
+    def test_store_init_valid_name(self):
+        """Test creating a store with a valid name."""
+        store = Store("Downtown")
+        assert store.name == "Downtown"
+        assert store.orders() == []
+    
+    def test_store_name_empty(self):
+        """Test that an empty name raises ValueError."""
+        with pytest.raises(ValueError):
+            Store("")
+    
+    def test_store_name_not_string(self):
+        """Test that a non-string name raises TypeError."""
+        with pytest.raises(TypeError):
+            Store(123)
+    
+    def test_order_store_type_check(self):
+        """Test that an order requires a Store instance when one is given."""
+        with pytest.raises(TypeError):
+            Order(Customer("Alice"), Coffee("Espresso"), 2.5, "Downtown")
+
+
+class TestStoreAggregates:
+    """Tests for per-store and merged aggregates."""
+    
+    def setup_method(self):
+        """Reset order tracking before each test."""
+        Customer._all_orders = []
+        Coffee._all_orders = []
+        self.registry = StoreRegistry()
+        self.downtown = self.registry.store("Downtown")
+        self.airport = self.registry.store("Airport")
+    
+    def test_registry_returns_same_store(self):
+        """Test that the registry creates each store once."""
+        assert self.registry.store("Downtown") is self.downtown
+        assert self.registry.stores() == [self.downtown, self.airport]
+    
+    def test_orders_are_sharded(self):
+        """Test that each store only sees its own orders."""
+        alice = Customer("Alice")
+        espresso = Coffee("Espresso")
+        order1 = alice.create_order(espresso, 2.0, self.downtown)
+        order2 = alice.create_order(espresso, 4.0, self.airport)
+        
+        assert self.downtown.orders() == [order1]
+        assert self.airport.orders() == [order2]
+        assert order1.store is self.downtown
+        assert len(espresso.orders()) == 2
+    
+    def test_average_price_per_store_and_global(self):
+        """Test average_price for one store and merged across stores."""
+        alice = Customer("Alice")
+        espresso = Coffee("Espresso")
+        alice.create_order(espresso, 2.0, self.downtown)
+        alice.create_order(espresso, 4.0, self.downtown)
+        alice.create_order(espresso, 9.0, self.airport)
+        
+        assert espresso.average_price(self.downtown) == 3.0
+        assert espresso.average_price(self.airport) == 9.0
+        assert espresso.average_price(self.registry) == 5.0
+        assert espresso.num_orders(self.registry) == 3
+    
+    def test_average_price_store_without_orders(self):
+        """Test that a store with no orders for a coffee averages to 0."""
+        espresso = Coffee("Espresso")
+        assert espresso.average_price(self.downtown) == 0
+        assert espresso.num_orders(self.downtown) == 0
+    
+    def test_most_aficionado_per_store_and_global(self):
+        """Test most_aficionado for one store and merged across stores."""
+        alice = Customer("Alice")
+        bob = Customer("Bob")
+        espresso = Coffee("Espresso")
+        alice.create_order(espresso, 5.0, self.downtown)
+        bob.create_order(espresso, 3.0, self.downtown)
+        bob.create_order(espresso, 4.0, self.airport)
+        
+        assert Customer.most_aficionado(espresso, self.downtown) == alice
+        assert Customer.most_aficionado(espresso, self.airport) == bob
+        assert Customer.most_aficionado(espresso, self.registry) == bob
+    
+    def test_most_aficionado_store_without_orders(self):
+        """Test that a store with no orders for a coffee returns None."""
+        espresso = Coffee("Espresso")
+        assert Customer.most_aficionado(espresso, self.registry) is None
+    
+    def test_aggregates_follow_order_changes(self):
+        """Test that updating an order keeps store aggregates consistent."""
+        alice = Customer("Alice")
+        bob = Customer("Bob")
+        espresso = Coffee("Espresso")
+        latte = Coffee("Latte")
+        order = alice.create_order(espresso, 2.0, self.downtown)
+        bob.create_order(espresso, 3.0, self.downtown)
+        
+        order.price = 6.0
+        assert espresso.average_price(self.downtown) == 4.5
+        assert Customer.most_aficionado(espresso, self.downtown) == alice
+        
+        order.coffee = latte
+        assert espresso.num_orders(self.downtown) == 1
+        assert latte.average_price(self.downtown) == 6.0
+        assert Customer.most_aficionado(espresso, self.downtown) == bob
+    
+    def test_indexes_merge_across_stores(self):
+        """Test that customer, coffee, price and co-purchase reads span every store."""
+        alice = Customer("Alice")
+        espresso = Coffee("Espresso")
+        latte = Coffee("Latte")
+        o1 = alice.create_order(espresso, 4.0, self.downtown)
+        o2 = alice.create_order(espresso, 2.0, self.airport)
+        o3 = alice.create_order(latte, 3.0)
+        o4 = alice.create_order(latte, 5.0, self.airport)
+        
+        assert alice._indexed_orders() == [o1, o2, o3, o4]
+        assert espresso.orders_between(1, 10) == [o2, o1]
+        assert espresso.price_percentile(50) == 2.0
+        assert espresso.also_ordered() == [latte]
+        o3.coffee = espresso
+        assert espresso.also_ordered() == [latte]
+        o4.coffee = espresso
+        assert espresso.also_ordered() == []
+        assert latte.also_ordered() == []
+    
+    def test_store_orders_lock_only_their_store(self):
+        """Test that an order at one store does not wait for another store's lock."""
+        alice = Customer("Alice")
+        espresso = Coffee("Espresso")
+        placed = []
+        thread = threading.Thread(
+            target=lambda: placed.append(alice.create_order(espresso, 2.0, self.airport))
+        )
+        with self.downtown._lock:
+            thread.start()
+            thread.join(timeout=5)
+            assert len(placed) == 1
+        assert espresso.num_orders(self.airport) == 1
+    
+    def test_concurrent_writes_to_different_stores(self):
+        """Test that threads placing orders at their own stores keep merged indexes consistent."""
+        customers = [Customer(f"C{i}") for i in range(20)]
+        coffees = [Coffee(f"Coffee{i}") for i in range(30)]
+        interval = sys.getswitchinterval()
+        
+        def place_orders(name):
+            store = self.registry.store(name)
+            rng = random.Random(name)
+            for _ in range(5000):
+                rng.choice(customers).create_order(rng.choice(coffees), 2.0, store)
+        
+        threads = [threading.Thread(target=place_orders, args=(f"S{i}",)) for i in range(8)]
+        sys.setswitchinterval(1e-6)
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        
+        assert len(Coffee._all_orders) == 40000
+        assert sum(coffee._indexed_count() for coffee in coffees) == 40000
+        assert sum(coffee.num_orders(self.registry) for coffee in coffees) == 40000
+        for coffee in coffees:
+            expected = {}
+            for customer in customers:
+                ordered = {order.coffee for order in customer._indexed_orders()}
+                if coffee in ordered:
+                    for other in ordered - {coffee}:
+                        expected[other] = expected.get(other, 0) + 1
+            assert coffee._co_orders == expected
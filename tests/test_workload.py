@@ -0,0 +1,168 @@
+
+"""Tests for workload capture and replay."""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path to import our classes
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from customer import Customer
+from coffee import Coffee
+from idempotency import IdempotencyCache
+from snapshot import snapshot
+from store import StoreRegistry
+from workload import load, record, replay
+
+
+class TestWorkload:
+    """Tests for recording and replaying traces."""
+    
+    def setup_method(self):
+        """Reset order tracking and remembered keys before each test."""
+        Customer._all_orders = []
+        Coffee._all_orders = []
+        Customer._idempotency = IdempotencyCache()
+    
+    def record_shop(self, path):
+        """Record a small workload."""
+        with record(str(path)) as recorder:
+            alice = Customer("Alice")
+            latte = Coffee("Latte")
+            alice.create_order(latte, 4.5)
+            alice.create_order(latte, 5.0, idempotency_key="sale-1")
+            latte.num_orders()
+            Customer.most_aficionado(latte)
+        return recorder
+    
+    def test_record_top_level_calls(self, tmp_path):
+        """Test that calls are recorded in order without nested calls."""
+        recorder = self.record_shop(tmp_path / "shop.trace")
+        events = load(str(tmp_path / "shop.trace"))
+        assert recorder.events == 6
+        assert [event[1:] for event in events] == [
+            ["customer", 0, "Alice"],
+            ["coffee", 0, "Latte"],
+            ["create_order", 0, 0, 4.5],
+            ["create_order", 0, 0, 5.0, "sale-1"],
+            ["coffee.num_orders", 0],
+            ["most_aficionado", 0],
+        ]
+        times = [event[0] for event in events]
+        assert times == sorted(times)
+    
+    def test_methods_restored(self, tmp_path):
+        """Test that recording stops when the block exits."""
+        init = Customer.__dict__["__init__"]
+        aficionado = Customer.__dict__["most_aficionado"]
+        self.record_shop(tmp_path / "shop.trace")
+        assert Customer.__dict__["__init__"] is init
+        assert Customer.__dict__["most_aficionado"] is aficionado
+        Customer("Bob")
+        assert len(load(str(tmp_path / "shop.trace"))) == 6
+    
+    def test_replay(self, tmp_path):
+        """Test that a replay rebuilds the same state and reports each operation."""
+        path = str(tmp_path / "shop.trace.gz")
+        self.record_shop(path)
+        results = replay(path, speed=0)
+        assert results["events"] == 6
+        assert results["operations"]["create_order"]["count"] == 2
+        assert set(results["operations"]["coffee.num_orders"]) == {
+            "count", "ops_per_second", "p50_us", "p99_us"
+        }
+        assert [order.price for order in Customer._all_orders] == [4.5, 5.0]
+    
+    def test_record_entities_created_before_recording(self, tmp_path):
+        """Test that customers and coffees are recorded on first use."""
+        path = str(tmp_path / "shop.trace")
+        alice = Customer("Alice")
+        latte = Coffee("Latte")
+        with record(path):
+            mocha = Coffee("Mocha")
+            latte.orders()
+            alice.create_order(mocha, 3.0)
+        assert [event[1:] for event in load(path)] == [
+            ["coffee", 0, "Mocha"],
+            ["coffee", 1, "Latte"],
+            ["coffee.orders", 1],
+            ["customer", 0, "Alice"],
+            ["create_order", 0, 0, 3.0],
+        ]
+        replay(path, speed=0)
+        assert [(o.customer.name, o.coffee.name) for o in Customer._all_orders] == [
+            ("Alice", "Mocha")
+        ]
+    
+    def test_record_and_replay_stores(self, tmp_path):
+        """Test that orders and queries keep their stores through a replay."""
+        path = str(tmp_path / "shop.trace")
+        stores = StoreRegistry()
+        with record(path):
+            alice = Customer("Alice")
+            latte = Coffee("Latte")
+            alice.create_order(latte, 4.0, store=stores.store("Downtown"))
+            alice.create_order(latte, 6.0, stores.store("Airport"), "sale-1")
+            latte.average_price(store=stores.store("Airport"))
+            latte.num_orders(stores)
+            with snapshot() as snap:
+                Customer.most_aficionado(latte, snap)
+        assert [event[1:] for event in load(path)][2:] == [
+            ["create_order", 0, 0, 4.0, None, "Downtown"],
+            ["create_order", 0, 0, 6.0, "sale-1", "Airport"],
+            ["coffee.average_price", 0, ["store", "Airport"]],
+            ["coffee.num_orders", 0, ["stores"]],
+            ["most_aficionado", 0, ["snapshot"]],
+        ]
+        results = replay(path, speed=0)
+        assert results["operations"]["most_aficionado"]["count"] == 1
+        assert [(o.store.name, o.price) for o in Customer._all_orders] == [
+            ("Downtown", 4.0), ("Airport", 6.0)
+        ]
+    
+    def test_tuple_keys_round_trip(self, tmp_path):
+        """Test that tuple idempotency keys still deduplicate after a replay."""
+        path = str(tmp_path / "shop.trace")
+        with record(path):
+            alice = Customer("Alice")
+            latte = Coffee("Latte")
+            alice.create_order(latte, 3.0, idempotency_key=("till-1", 7))
+            alice.create_order(latte, 3.0, idempotency_key=("till-1", 7))
+        assert load(path)[-1][1:] == ["create_order", 0, 0, 3.0, ["till-1", 7]]
+        replay(path, speed=0)
+        assert len(Customer._all_orders) == 1
+    
+    def test_unrecordable_key_raises(self, tmp_path):
+        """Test that a key that cannot be written to the trace fails loudly."""
+        with record(str(tmp_path / "shop.trace")):
+            alice = Customer("Alice")
+            latte = Coffee("Latte")
+            with pytest.raises(TypeError):
+                alice.create_order(latte, 3.0, idempotency_key=frozenset({"k"}))
+        assert Customer._all_orders == []
+    
+    def test_replay_deduplicates_keys(self, tmp_path):
+        """Test that a replayed idempotency key still creates a single order."""
+        path = str(tmp_path / "shop.trace")
+        with open(path, "w") as f:
+            f.write('[0,"customer",0,"Alice"]\n[1,"coffee",0,"Latte"]\n')
+            f.write('[2,"create_order",0,0,3.0,"k"]\n[3,"create_order",0,0,3.0,"k"]\n')
+        replay(path, speed=0)
+        assert len(Customer._all_orders) == 1
+    
+    def test_replay_speed(self, tmp_path):
+        """Test that replay follows the recorded pace scaled by speed."""
+        path = str(tmp_path / "shop.trace")
+        with open(path, "w") as f:
+            f.write('[0,"coffee",0,"Latte"]\n[200000,"coffee.orders",0]\n')
+        assert replay(path, speed=1)["seconds"] >= 0.2
+        assert replay(path, speed=10)["seconds"] < 0.2
+    
+    def test_replay_unknown_operation(self, tmp_path):
+        """Test that an unknown operation is rejected."""
+        path = str(tmp_path / "shop.trace")
+        with open(path, "w") as f:
+            f.write('[0,"refund",0]\n')
+        with pytest.raises(ValueError):
+            replay(path, speed=0)
@@ -0,0 +1,494 @@
+
+"""
+Workload capture and replay.
+
+Record the real sequence of model calls to a trace file, then replay it at the
+original pace, N times faster, or as fast as possible:
+
+python workload.py record shop.trace.gz debug.py
+python workload.py replay shop.trace.gz --speed 10
+
+Each trace line is a JSON array: [microseconds since start, operation, args...].
+Customers and coffees are referred to by the order in which they were first
+seen; ones created before recording started are recorded on first use.
+Orders name their store, queries against stores end in ["store", name],
+["stores"] or ["snapshot"], and idempotency keys may be strings, numbers or
+tuples of them. Traces whose name ends in .gz are gzip-compressed.
+"""
+
+import argparse
+import functools
+import gzip
+import json
+import runpy
+import sys
+import threading
+import time
+
+from customer import Customer
+from coffee import Coffee
+from idempotency import IdempotencyCache
+import order  # noqa: F401 (loaded up front so timings exclude its import)
+from loadgen import percentile
+from snapshot import Snapshot, snapshot
+from store import Store, StoreRegistry
+
+# Query methods recorded as "<kind>.<method>" with the entity as their only argument
+CUSTOMER_QUERIES = ("orders", "coffees")
+COFFEE_QUERIES = ("orders", "customers", "num_orders", "average_price")
+
+
+def _open(path, mode):
+    """
+    Open a trace file, compressed if its name ends in .gz.
+    
+    Args:
+        path (str): Trace file path
+        mode (str): "r" or "w"
+    
+    Returns:
+        file: A text file object
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class Recorder:
+    """Records model calls to a trace file while active."""
+    
+    def __init__(self, path):
+        """
+        Initialize a Recorder.
+        
+        Args:
+            path (str): Trace file to write
+        """
+        self.path = path
+        self.events = 0
+        self._file = None
+        self._start = None
+        # Reentrant so a first use can record the entity before the call itself
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        # Recorded customers and coffees, numbered per kind in order of first use
+        self._ids = {}
+        self._counts = {"customer": 0, "coffee": 0}
+        self._originals = []
+    
+    def __enter__(self):
+        """Start recording."""
+        self.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        """Stop recording."""
+        self.stop()
+    
+    def start(self):
+        """Open the trace file and start intercepting model calls."""
+        self._file = _open(self.path, "w")
+        self._start = time.perf_counter()
+        self._patch(Customer, "__init__", self._record_entity("customer"))
+        self._patch(Coffee, "__init__", self._record_entity("coffee"))
+        self._patch(Customer, "create_order", self._record_order)
+        for name in CUSTOMER_QUERIES:
+            self._patch(Customer, name, self._record_query(f"customer.{name}", "customer"))
+        for name in COFFEE_QUERIES:
+            self._patch(Coffee, name, self._record_query(f"coffee.{name}", "coffee"))
+        # most_aficionado is a classmethod keyed by the coffee, so wrap the bound method
+        original = Customer.__dict__["most_aficionado"]
+        wrapped = self._record_query("most_aficionado", "coffee")(Customer.most_aficionado)
+        self._originals.append((Customer, "most_aficionado", original))
+        Customer.most_aficionado = classmethod(
+            lambda cls, coffee, store=None: wrapped(coffee, store)
+        )
+    
+    def stop(self):
+        """Restore the model's methods and close the trace file."""
+        for cls, name, original in reversed(self._originals):
+            setattr(cls, name, original)
+        self._originals = []
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def _patch(self, cls, name, make_wrapper):
+        """
+        Replace a method with a recording wrapper.
+        
+        Args:
+            cls (type): Class owning the method
+            name (str): Method name
+            make_wrapper (callable): Builds the wrapper from the original method
+        """
+        original = cls.__dict__[name]
+        self._originals.append((cls, name, original))
+        setattr(cls, name, functools.wraps(original)(make_wrapper(original)))
+    
+    def _write(self, op, *args):
+        """
+        Write one trace event.
+        
+        Args:
+            op (str): Operation name
+            *args: JSON-serializable arguments
+        """
+        elapsed = int((time.perf_counter() - self._start) * 1e6)
+        line = json.dumps([elapsed, op, *args], separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+            self.events += 1
+    
+    def _entity_id(self, entity, kind):
+        """
+        Get the trace id of a customer or coffee, recording it on first use.
+        
+        Args:
+            entity (Customer or Coffee): The entity
+            kind (str): "customer" or "coffee"
+        
+        Returns:
+            int: The entity's id within its kind
+        """
+        with self._lock:
+            entity_id = self._ids.get(entity)
+            if entity_id is None:
+                entity_id = self._ids[entity] = self._counts[kind]
+                self._counts[kind] += 1
+                self._write(kind, entity_id, entity.name)
+            return entity_id
+    
+    def _call(self, func, *args, **kwargs):
+        """
+        Call a model method, reporting whether it was the outermost recorded call.
+        
+        Nested calls (such as num_orders calling orders) are not recorded.
+        
+        Returns:
+            tuple: (result, True if this was the outermost call)
+        """
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        try:
+            return func(*args, **kwargs), depth == 0
+        finally:
+            self._local.depth = depth
+    
+    def _record_entity(self, kind):
+        """
+        Build a wrapper factory for Customer or Coffee creation.
+        
+        Args:
+            kind (str): "customer" or "coffee"
+        
+        Returns:
+            callable: Wrapper factory
+        """
+        def make_wrapper(original):
+            def wrapper(entity, name, *args, **kwargs):
+                _, outermost = self._call(original, entity, name, *args, **kwargs)
+                if outermost:
+                    self._entity_id(entity, kind)
+            return wrapper
+        return make_wrapper
+    
+    def _record_order(self, original):
+        """
+        Build the wrapper for Customer.create_order.
+        
+        Args:
+            original (callable): The original method
+        
+        Returns:
+            callable: Wrapper
+        """
+        def wrapper(customer, coffee, price, store=None, idempotency_key=None):
+            # Keys are replayed so retried submissions stay deduplicated; check
+            # the key first so an unrecordable one never creates an order
+            key = _encode_key(idempotency_key)
+            order, outermost = self._call(original, customer, coffee, price, store, idempotency_key)
+            if outermost:
+                args = [
+                    self._entity_id(customer, "customer"), self._entity_id(coffee, "coffee"), price,
+                ]
+                if store is not None:
+                    args += [key, store.name]
+                elif key is not None:
+                    args.append(key)
+                self._write("create_order", *args)
+            return order
+        return wrapper
+    
+    def _record_query(self, op, kind):
+        """
+        Build a wrapper factory for a query taking one entity and an optional store.
+        
+        Args:
+            op (str): Operation name
+            kind (str): Kind of the entity, "customer" or "coffee"
+        
+        Returns:
+            callable: Wrapper factory
+        """
+        def make_wrapper(original):
+            def wrapper(entity, *args, **kwargs):
+                result, outermost = self._call(original, entity, *args, **kwargs)
+                if outermost:
+                    store = kwargs.get("store", args[0] if args else None)
+                    if store is None:
+                        self._write(op, self._entity_id(entity, kind))
+                    else:
+                        self._write(op, self._entity_id(entity, kind), _encode_store(store))
+                return result
+            return wrapper
+        return make_wrapper
+
+
+def _encode_key(key):
+    """
+    Convert an idempotency key to JSON for the trace.
+    
+    Args:
+        key (hashable): The key, or None
+    
+    Returns:
+        object: The key, with tuples as JSON arrays
+    
+    Raises:
+        TypeError: If the key is not a string, number or tuple of them
+    """
+    if key is None or isinstance(key, (str, int, float)):
+        return key
+    if isinstance(key, tuple):
+        return [_encode_key(item) for item in key]
+    raise TypeError(f"Cannot record idempotency key of type {type(key).__name__}.")
+
+
+def _decode_key(key):
+    """
+    Convert an idempotency key read from a trace back to its recorded value.
+    
+    Args:
+        key (object): The key as stored in the trace
+    
+    Returns:
+        hashable: The key, with JSON arrays as tuples
+    """
+    if isinstance(key, list):
+        return tuple(_decode_key(item) for item in key)
+    return key
+
+
+def _encode_store(store):
+    """
+    Describe the store a query was restricted to.
+    
+    Args:
+        store (Store, StoreRegistry or Snapshot): The query's store argument
+    
+    Returns:
+        list: ["store", name], ["stores"] or ["snapshot"]
+    
+    Raises:
+        TypeError: If store is none of these
+    """
+    if isinstance(store, Store):
+        return ["store", store.name]
+    if isinstance(store, StoreRegistry):
+        return ["stores"]
+    if isinstance(store, Snapshot):
+        return ["snapshot"]
+    raise TypeError(f"Cannot record a query against {type(store).__name__}.")
+
+
+def record(path):
+    """
+    Record model calls made inside a with block.
+    
+    Args:
+        path (str): Trace file to write
+    
+    Returns:
+        Recorder: A context manager
+    """
+    return Recorder(path)
+
+
+def load(path):
+    """
+    Read a trace file.
+    
+    Args:
+        path (str): Trace file path
+    
+    Returns:
+        list: Events as lists of [microseconds, operation, args...]
+    """
+    with _open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def replay(path, speed=1.0, reset=True):
+    """
+    Replay a trace against the model and measure each operation.
+    
+    Stores are recreated by name in a new StoreRegistry; queries recorded
+    against a snapshot run against a snapshot taken when they are replayed.
+    
+    Args:
+        path (str): Trace file path
+        speed (float): Pace relative to the recording (0 replays as fast as possible)
+        reset (bool): Clear all orders and idempotency keys before replaying
+    
+    Returns:
+        dict: "seconds", "events", "ops_per_second", and per-operation stats
+            under "operations" (count, ops_per_second, p50_us, p99_us)
+    
+    Raises:
+        ValueError: If the trace contains an unknown operation
+    """
+    events = load(path)
+    if reset:
+        Customer._all_orders = []
+        Coffee._all_orders = []
+        Customer._idempotency = IdempotencyCache()
+    entities = {"customer": [], "coffee": []}
+    stores = StoreRegistry()
+    handlers = {
+        "customer": lambda _, name: entities["customer"].append(Customer(name)),
+        "coffee": lambda _, name: entities["coffee"].append(Coffee(name)),
+        "create_order": lambda customer, coffee, price, key=None, store=None: entities[
+            "customer"
+        ][customer].create_order(
+            entities["coffee"][coffee], price,
+            store=stores.store(store) if store is not None else None,
+            idempotency_key=_decode_key(key),
+        ),
+        "most_aficionado": _query_handler(
+            entities["coffee"], stores, lambda coffee, **kwargs: Customer.most_aficionado(
+                coffee, **kwargs
+            )
+        ),
+    }
+    for name in CUSTOMER_QUERIES:
+        handlers[f"customer.{name}"] = _method_handler(entities["customer"], stores, name)
+    for name in COFFEE_QUERIES:
+        handlers[f"coffee.{name}"] = _method_handler(entities["coffee"], stores, name)
+    
+    latencies = {}
+    start = time.perf_counter()
+    for elapsed, op, *args in events:
+        handler = handlers.get(op)
+        if handler is None:
+            raise ValueError(f"Unknown operation in trace: {op}")
+        if speed:
+            delay = start + elapsed / 1e6 / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        began = time.perf_counter()
+        handler(*args)
+        latencies.setdefault(op, []).append(time.perf_counter() - began)
+    seconds = time.perf_counter() - start
+    
+    operations = {}
+    for op, values in latencies.items():
+        values.sort()
+        operations[op] = {
+            "count": len(values),
+            "ops_per_second": len(values) / sum(values) if sum(values) else 0,
+            "p50_us": percentile(values, 0.50) * 1e6,
+            "p99_us": percentile(values, 0.99) * 1e6,
+        }
+    return {
+        "seconds": seconds,
+        "events": len(events),
+        "ops_per_second": len(events) / seconds if seconds else 0,
+        "operations": operations,
+    }
+
+
+def _method_handler(entities, stores, name):
+    """
+    Build a replay handler for a query method.
+    
+    Args:
+        entities (list): Customers or coffees in creation order
+        stores (StoreRegistry): Stores recreated by the replay
+        name (str): Method name
+    
+    Returns:
+        callable: Handler taking the entity's index and optional store
+    """
+    return _query_handler(entities, stores, lambda entity, **kwargs: getattr(entity, name)(**kwargs))
+
+
+def _query_handler(entities, stores, query):
+    """
+    Build a replay handler for a query taking one entity and an optional store.
+    
+    Args:
+        entities (list): Customers or coffees in creation order
+        stores (StoreRegistry): Stores recreated by the replay
+        query (callable): Runs the query for an entity, with store as a keyword
+    
+    Returns:
+        callable: Handler taking the entity's index and optional store
+    """
+    def handler(index, store=None):
+        entity = entities[index]
+        if store is None:
+            return query(entity)
+        if store[0] == "snapshot":
+            with snapshot() as snap:
+                return query(entity, store=snap)
+        if store[0] == "stores":
+            return query(entity, store=stores)
+        return query(entity, store=stores.store(store[1]))
+    return handler
+
+
+def main(argv=None):
+    """
+    Record or replay a workload from the command line.
+    
+    Args:
+        argv (list, optional): Command-line arguments
+    
+    Returns:
+        int: Exit status
+    """
+    parser = argparse.ArgumentParser(description="Capture and replay coffee shop workloads.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="Run a script and record its model calls")
+    record_parser.add_argument("trace")
+    record_parser.add_argument("script")
+    record_parser.add_argument("args", nargs=argparse.REMAINDER)
+    replay_parser = commands.add_parser("replay", help="Replay a trace and report throughput")
+    replay_parser.add_argument("trace")
+    replay_parser.add_argument("--speed", type=float, default=1.0,
+                               help="Pace multiplier; 0 replays as fast as possible")
+    args = parser.parse_args(argv)
+    
+    if args.command == "record":
+        sys.argv = [args.script, *args.args]
+        with record(args.trace) as recorder:
+            runpy.run_path(args.script, run_name="__main__")
+        print(f"recorded {recorder.events} events to {args.trace}", file=sys.stderr)
+        return 0
+    
+    results = replay(args.trace, args.speed)
+    print(f"events:  {results['events']}")
+    print(f"seconds: {results['seconds']:.3f}")
+    print(f"ops/s:   {results['ops_per_second']:.0f}")
+    for op in sorted(results["operations"]):
+        stats = results["operations"][op]
+        print(
+            f"{op:<22} {stats['count']:>8} ops  {stats['ops_per_second']:>10.0f} ops/s  "
+            f"p50 {stats['p50_us']:8.1f} us  p99 {stats['p99_us']:8.1f} us"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())